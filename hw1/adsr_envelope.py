@@ -0,0 +1,142 @@
+"""
+流式ADSR包络状态机
+
+generate_envelope(N, ...) 需要事先知道音符总长度，并一次生成整段包络。
+实时或流式合成时音符长度事先未知，这里用状态机逐块输出包络：
+按下(note_on)后依次经过 attack -> decay -> sustain，
+松开(note_off)后从当前电平进入 release，结束后输出0。
+各段的取值与 generate_envelope 中 np.linspace 的结果一致，内存占用与音符长度无关。
+"""
+import numpy as np
+
+IDLE, ATTACK, DECAY, SUSTAIN, RELEASE, DONE = range(6)
+
+
+class ADSREnvelope:
+    """
+    ADSR包络发生器
+
+    参数:
+        attack_samples: 起音段采样点数
+        decay_samples: 衰减段采样点数
+        sustain: 保持段电平
+        release_samples: 释音段采样点数
+    """
+
+    def __init__(self, attack_samples, decay_samples, sustain, release_samples):
+        self.attack_samples = int(attack_samples)
+        self.decay_samples = int(decay_samples)
+        self.sustain = sustain
+        self.release_samples = int(release_samples)
+        self.stage = IDLE
+        self.pos = 0  # 当前段内已输出的点数
+        self.level = 0.0  # 最近一次输出的电平
+        self.release_level = sustain
+        self._idx = np.arange(0, dtype=np.float64)
+
+    @classmethod
+    def from_seconds(cls, Fs, attack, decay, sustain, release):
+        """按秒指定各段时长"""
+        return cls(attack * Fs, decay * Fs, sustain, release * Fs)
+
+    @property
+    def finished(self):
+        return self.stage == DONE
+
+    def note_on(self):
+        self.stage = ATTACK
+        self.pos = 0
+
+    def note_off(self):
+        if self.stage in (IDLE, DONE):
+            return
+        self.release_level = self.level
+        self.stage = RELEASE
+        self.pos = 0
+
+    def _ramp(self, seg, start, end, length):
+        """把 linspace(start, end, length) 中从 self.pos 开始的部分写入 seg"""
+        n = len(seg)
+        if length > 1:
+            if len(self._idx) < n:
+                self._idx = np.arange(n, dtype=np.float64)
+            step = (end - start) / (length - 1)
+            np.multiply(self._idx[:n], step, out=seg)
+            seg += start + step * self.pos
+        else:
+            seg[:] = start
+
+    def process(self, out):
+        """
+        产生下一块包络并写入 out
+
+        参数:
+            out: 一维数组，长度即本块的采样点数
+
+        返回:
+            out
+        """
+        i = 0
+        n = len(out)
+        while i < n:
+            if self.stage in (IDLE, DONE):
+                out[i:] = 0.0
+                self.level = 0.0
+                break
+            if self.stage == SUSTAIN:
+                out[i:] = self.sustain
+                self.level = self.sustain
+                break
+
+            if self.stage == ATTACK:
+                length, start, end, next_stage = self.attack_samples, 0.0, 1.0, DECAY
+            elif self.stage == DECAY:
+                length, start, end, next_stage = self.decay_samples, 1.0, self.sustain, SUSTAIN
+            else:
+                length, start, end, next_stage = self.release_samples, self.release_level, 0.0, DONE
+
+            m = min(length - self.pos, n - i)
+            if m > 0:
+                self._ramp(out[i:i + m], start, end, length)
+                self.level = out[i + m - 1]
+                self.pos += m
+                i += m
+            if self.pos >= length:
+                self.stage = next_stage
+                self.pos = 0
+        return out
+
+
+if __name__ == '__main__':
+    import time
+
+    from electronic_piano_simple import generate_envelope
+    from signal_stream import SignalStream
+
+    Fs = 44100
+    block_size = 512
+
+    # 一个按住1.5秒后松开的音符，逐块合成
+    env = ADSREnvelope.from_seconds(Fs, 0.05, 0.1, 0.7, 0.3)
+    osc = SignalStream(Fs, block_size, A=0.3, F=440.0)
+    tone = np.empty(block_size)
+    gain = np.empty(block_size)
+    held_blocks = int(1.5 * Fs / block_size)
+
+    start = time.perf_counter()
+    env.note_on()
+    n_blocks = 0
+    while not env.finished:
+        if n_blocks == held_blocks:
+            env.note_off()
+        osc.read_into(tone)
+        env.process(gain)
+        tone *= gain
+        n_blocks += 1
+    elapsed = time.perf_counter() - start
+    print(f"Streamed note: {n_blocks} blocks of {block_size} samples ({n_blocks * block_size / Fs:.2f} s) "
+          f"in {elapsed * 1e3:.1f} ms")
+
+    N = 44100
+    e1 = generate_envelope(N)
+    print(f"generate_envelope wrapper length {len(e1)}, peak {e1.max():.2f}, end {e1[-1]:.2f}")
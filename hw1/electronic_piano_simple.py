@@ -1,29 +1,31 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from adsr_envelope import ADSREnvelope
+
 def generate_envelope(N, attack=0.1, decay=0.1, sustain=0.7, release=0.2):
-    envelope = np.ones(N)
     attack_samples = int(N * attack)
     decay_samples = int(N * decay)
     release_samples = int(N * release)
-    sustain_samples = N - attack_samples - decay_samples - release_samples
 
-    envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-    envelope[attack_samples:attack_samples+decay_samples] = np.linspace(1, sustain, decay_samples)
-    envelope[attack_samples+decay_samples:attack_samples+decay_samples+sustain_samples] = sustain
-    envelope[-release_samples:] = np.linspace(sustain, 0, release_samples)
+    # 整段包络由流式ADSR状态机生成，在最后 release_samples 点处松开
+    env = ADSREnvelope(attack_samples, decay_samples, sustain, release_samples)
+    envelope = np.empty(N)
+    env.note_on()
+    env.process(envelope[:N - release_samples])
+    env.note_off()
+    env.process(envelope[N - release_samples:])
 
     return envelope
 
 def generate_piano_tone(freq, duration, Fs=44100, harmonics=[1, 0.5, 0.25, 0.125]):
+    # note_bank 导入了本模块的 generate_envelope，所以在函数内导入
+    from note_bank import harmonic_tone
+
     N = int(duration * Fs)
     t = np.arange(N) / Fs
 
-    signal = np.zeros(N)
-    for i, amp in enumerate(harmonics):
-        signal += amp * np.sin(2 * np.pi * freq * (i+1) * t)
-
-    signal = signal / np.max(np.abs(signal))
+    signal = harmonic_tone(freq, N, Fs, harmonics)
     envelope = generate_envelope(N)
     signal = signal * envelope * 0.3
 
@@ -34,34 +36,40 @@ keys = {
     'C2': 523, 'D2': 587, 'E2': 659, 'F2': 698, 'G2': 784, 'A2': 880, 'B2': 988
 }
 
-print("Simple Electronic Piano (Visualization Version)")
-print("Available notes:", list(keys.keys()))
+if __name__ == '__main__':
+    from note_bank import NoteBank
+
+    print("Simple Electronic Piano (Visualization Version)")
+    print("Available notes:", list(keys.keys()))
+
+    demo_notes = ['C', 'E', 'G', 'C2']
+    print(f"\nGenerating demo melody: {demo_notes}")
 
-demo_notes = ['C', 'E', 'G', 'C2']
-print(f"\nGenerating demo melody: {demo_notes}")
+    bank = NoteBank(Fs=44100)
 
-fig, axes = plt.subplots(len(demo_notes), 1, figsize=(12, 10))
+    fig, axes = plt.subplots(len(demo_notes), 1, figsize=(12, 10))
 
-for i, note in enumerate(demo_notes):
-    t, sig = generate_piano_tone(keys[note], 1.0)
+    for i, note in enumerate(demo_notes):
+        t, sig = bank.tone(keys[note], 1.0)
 
-    axes[i].plot(t[:5000], sig[:5000], linewidth=1)
-    axes[i].set_title(f'Note: {note} ({keys[note]} Hz) with ADSR envelope and harmonics')
-    axes[i].set_ylabel('Amplitude')
-    axes[i].grid(True)
+        axes[i].plot(t[:5000], sig[:5000], linewidth=1)
+        axes[i].set_title(f'Note: {note} ({keys[note]} Hz) with ADSR envelope and harmonics')
+        axes[i].set_ylabel('Amplitude')
+        axes[i].grid(True)
 
-    env = generate_envelope(len(sig))
-    axes[i].plot(t[:5000], env[:5000] * 0.3, 'r--', linewidth=1.5, alpha=0.7, label='Envelope')
-    axes[i].legend()
+        env = bank.envelope(len(sig))
+        axes[i].plot(t[:5000], env[:5000] * 0.3, 'r--', linewidth=1.5, alpha=0.7, label='Envelope')
+        axes[i].legend()
 
-axes[-1].set_xlabel('Time (s)')
+    axes[-1].set_xlabel('Time (s)')
 
-plt.tight_layout()
-plt.savefig('piano_output.png', dpi=150)
-print(f"\nWaveforms saved as piano_output.png")
-print(f"\nEach note includes:")
-print(f"  - ADSR envelope (red dashed line)")
-print(f"  - 4 harmonics at frequencies: f, 2f, 3f, 4f")
-print(f"  - Harmonic amplitudes: 1.0, 0.5, 0.25, 0.125")
+    plt.tight_layout()
+    plt.savefig('piano_output.png', dpi=150)
+    print(f"\nWaveforms saved as piano_output.png")
+    print(f"\nEach note includes:")
+    print(f"  - ADSR envelope (red dashed line)")
+    print(f"  - 4 harmonics at frequencies: f, 2f, 3f, 4f")
+    print(f"  - Harmonic amplitudes: 1.0, 0.5, 0.25, 0.125")
+    print(f"  - Note bank: {bank.hits} cache hits, {bank.misses} renders")
 
-plt.show()
+    plt.show()
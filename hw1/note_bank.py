@@ -0,0 +1,175 @@
+"""
+电子琴音符库(带缓存)
+
+每个 (频率, 时长, 谐波, ADSR) 组合只合成一次：谐波在一次广播运算中叠加，
+结果放进按总字节数限制容量的 LRU 缓存，可选地再保存为磁盘上的 .npy 文件。
+演奏整段旋律时，重复出现的音符直接从缓存取出，不再重新合成。
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from electronic_piano_simple import generate_envelope
+
+DEFAULT_HARMONICS = (1, 0.5, 0.25, 0.125)
+DEFAULT_ADSR = (0.1, 0.1, 0.7, 0.2)
+
+
+def harmonic_tone(freq, N, Fs, harmonics):
+    """
+    一次广播计算所有谐波之和，并归一化到最大值为1
+
+    参数:
+        freq: 基频 (Hz)
+        N: 采样点数
+        Fs: 采样频率
+        harmonics: 各次谐波的幅值
+
+    返回:
+        长度为N的信号
+    """
+    t = np.arange(N) / Fs
+    k = np.arange(1, len(harmonics) + 1)
+    signal = np.sin(2 * np.pi * freq * t[:, None] * k) @ np.asarray(harmonics, dtype=float)
+    peak = np.max(np.abs(signal)) if N > 0 else 0
+    if peak > 0:
+        signal /= peak
+    return signal
+
+
+class NoteBank:
+    """
+    音符缓存库
+
+    参数:
+        Fs: 采样频率
+        max_bytes: 内存中音符和包络数据的总字节数上限，超过时淘汰最久未使用的
+                   (音符长度差别很大，按个数限制无法控制内存)
+        cache_dir: 可选的磁盘缓存目录，音符以 .npy 文件保存
+        gain: 输出增益，与 generate_piano_tone 中的 0.3 一致
+    """
+
+    def __init__(self, Fs=44100, max_bytes=64 * 2**20, cache_dir=None, gain=0.3):
+        self.Fs = Fs
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.gain = gain
+        self._notes = OrderedDict()
+        self._envelopes = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, freq, N, harmonics, adsr):
+        return (self.Fs, float(freq), int(N), tuple(float(h) for h in harmonics),
+                tuple(float(a) for a in adsr), float(self.gain))
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return os.path.join(self.cache_dir, f"note_{name}.npy")
+
+    def _remember(self, cache, key, value):
+        value.setflags(write=False)
+        old = cache.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        cache[key] = value
+        self.nbytes += value.nbytes
+        # 先淘汰音符再淘汰包络，刚加入的这一项总是保留
+        for c in (self._notes, self._envelopes):
+            while self.nbytes > self.max_bytes and len(c) > (1 if c is cache else 0):
+                _, evicted = c.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return value
+
+    def envelope(self, N, adsr=DEFAULT_ADSR):
+        """返回长度为N的ADSR包络(只读，来自缓存)"""
+        key = (int(N), tuple(adsr))
+        env = self._envelopes.get(key)
+        if env is not None:
+            self._envelopes.move_to_end(key)
+            return env
+        return self._remember(self._envelopes, key, generate_envelope(N, *adsr))
+
+    def render(self, freq, duration, harmonics=DEFAULT_HARMONICS, adsr=DEFAULT_ADSR):
+        """
+        返回一个音符的采样数据(只读)，已缓存时直接返回
+
+        参数:
+            freq: 基频 (Hz)
+            duration: 时长 (秒)
+            harmonics: 各次谐波的幅值
+            adsr: (attack, decay, sustain, release)，含义与 generate_envelope 相同
+
+        返回:
+            长度为 int(duration*Fs) 的信号
+        """
+        N = int(duration * self.Fs)
+        key = self._key(freq, N, harmonics, adsr)
+
+        sig = self._notes.get(key)
+        if sig is not None:
+            self.hits += 1
+            self._notes.move_to_end(key)
+            return sig
+
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                self.disk_hits += 1
+                return self._remember(self._notes, key, np.load(path))
+
+        self.misses += 1
+        sig = harmonic_tone(freq, N, self.Fs, harmonics)
+        sig *= self.envelope(N, adsr)
+        sig *= self.gain
+        if self.cache_dir is not None:
+            np.save(self._disk_path(key), sig)
+        return self._remember(self._notes, key, sig)
+
+    def tone(self, freq, duration, harmonics=DEFAULT_HARMONICS, adsr=DEFAULT_ADSR):
+        """与 generate_piano_tone 接口相同，返回 (t, signal)"""
+        sig = self.render(freq, duration, harmonics, adsr)
+        return np.arange(len(sig)) / self.Fs, sig
+
+    def clear(self):
+        self._notes.clear()
+        self._envelopes.clear()
+        self.nbytes = 0
+
+
+if __name__ == '__main__':
+    import time
+
+    from electronic_piano_simple import generate_piano_tone, keys
+
+    melody = ['C', 'C', 'G', 'G', 'A', 'A', 'G', 'F', 'F', 'E', 'E', 'D', 'D', 'C'] * 4
+
+    start = time.perf_counter()
+    for note in melody:
+        generate_piano_tone(keys[note], 0.5)
+    t_direct = time.perf_counter() - start
+
+    bank = NoteBank()
+    start = time.perf_counter()
+    for note in melody:
+        bank.render(keys[note], 0.5)
+    t_bank = time.perf_counter() - start
+
+    _, ref = generate_piano_tone(keys['A'], 0.5)
+    print(f"{len(melody)} notes: direct synthesis {t_direct:.3f} s, note bank {t_bank:.3f} s")
+    print(f"Cache: {bank.hits} hits, {bank.misses} renders")
+    print(f"Max difference vs generate_piano_tone: {np.max(np.abs(bank.render(keys['A'], 0.5) - ref)):.2e}")
+
+    # 内存上限按字节计算: 2秒的长音符比0.1秒的短音符多占20倍
+    small = NoteBank(max_bytes=2 * 2**20)
+    for note in keys:
+        small.render(keys[note], 2.0)
+        small.render(keys[note], 0.1)
+    print(f"Byte-bounded bank: {len(small._notes)} notes + {len(small._envelopes)} envelopes kept, "
+          f"{small.nbytes / 2**20:.2f} MB (limit {small.max_bytes / 2**20:.0f} MB)")
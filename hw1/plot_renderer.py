@@ -0,0 +1,88 @@
+"""
+PyQt 和 Tkinter 正弦波发生器共用的增量绘图层
+
+原来每次拖动滑块都会清空坐标轴、重新 plot 并完整 draw()，拖动时界面卡顿。
+这里 Line2D 和参数文字只创建一次，之后只用 set_ydata 更新数据，并用 blit 只重绘坐标轴区域。
+滑块事件先记录下来，由 matplotlib 画布自带的定时器按固定帧率合并处理，
+每帧最多重绘一次。定时器来自 canvas.new_timer，所以 Qt 和 Tk 后端都能用。
+"""
+import numpy as np
+
+
+class SineRenderer:
+    """
+    正弦波增量绘图器
+
+    参数:
+        fig: matplotlib Figure
+        canvas: 对应的画布(FigureCanvasQTAgg 或 FigureCanvasTkAgg)
+        ax: 坐标轴，为 None 时在 fig 中新建
+        Fs: 采样频率
+        N: 采样点数
+        fps: 最大重绘帧率
+    """
+
+    def __init__(self, fig, canvas, ax=None, Fs=44100, N=2000, fps=30):
+        self.fig = fig
+        self.canvas = canvas
+        self.ax = ax if ax is not None else fig.add_subplot(111)
+        self.Fs = Fs
+        self.N = N
+        self.t = np.arange(N) / Fs
+        self._phase = np.empty(N)
+        self._y = np.zeros(N)
+        self._params = None
+        self._background = None
+        self.frames = 0
+        self.requests = 0
+
+        ax = self.ax
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Amplitude')
+        ax.set_title('Sine Wave')
+        ax.grid(True)
+        ax.set_xlim(self.t[0], self.t[-1])
+        ax.set_ylim(-1.2, 1.2)
+        (self.line,) = ax.plot(self.t, self._y, 'b-', linewidth=1.5, animated=True)
+        self.label = ax.text(0.01, 0.97, '', transform=ax.transAxes, va='top', animated=True)
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.timer = self.canvas.new_timer(interval=int(1000 / fps))
+        self.timer.add_callback(self._on_timer)
+        self.timer.start()
+
+    def request(self, F, A, P):
+        """记录最新参数，实际绘制在下一帧进行"""
+        self._params = (F, A, P)
+        self.requests += 1
+
+    def _on_draw(self, event):
+        # 完整重绘(窗口大小改变等)后保存背景，并把动态元素画回去
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        self.ax.draw_artist(self.line)
+        self.ax.draw_artist(self.label)
+
+    def _on_timer(self):
+        if self._params is None:
+            return
+        F, A, P = self._params
+        self._params = None
+
+        # y = A*sin(2πFt + P°)，写入预分配的缓冲区
+        np.multiply(self.t, 2 * np.pi * F, out=self._phase)
+        self._phase += P * np.pi / 180
+        np.sin(self._phase, out=self._y)
+        self._y *= A
+        self.line.set_ydata(self._y)
+        self.label.set_text(f'F={F}Hz, A={A:.2f}, Phase={P}deg')
+
+        if self._background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_artists()
+            self.canvas.blit(self.ax.bbox)
+        self.frames += 1
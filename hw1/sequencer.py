@@ -0,0 +1,142 @@
+"""
+复音音序器
+
+按乐谱 [(音符, 起始时间, 时长, 力度), ...] 把重叠的音符叠加(overlap-add)到同一路输出，
+按固定长度的块依次产生并写入 WAV 文件。音符数据来自 NoteBank 缓存，
+输出只占用一个块的缓冲区，几分钟的曲子内存占用也保持不变。
+"""
+import time
+import wave
+
+import numpy as np
+
+from electronic_piano_simple import keys
+from note_bank import NoteBank
+
+
+class Sequencer:
+    """
+    复音音序器
+
+    参数:
+        Fs: 采样频率
+        bank: 音符库，默认新建一个 NoteBank；采样频率必须与 Fs 相同
+        chunk_size: 每块输出的采样点数
+        gain: 总输出增益
+    """
+
+    def __init__(self, Fs=44100, bank=None, chunk_size=16384, gain=1.0):
+        self.Fs = Fs
+        self.bank = bank if bank is not None else NoteBank(Fs=Fs)
+        if self.bank.Fs != Fs:
+            raise ValueError(f"音符库的采样频率 {self.bank.Fs}Hz 与音序器的 {Fs}Hz 不同")
+        self.chunk_size = chunk_size
+        self.gain = gain
+        self._buf = np.zeros(chunk_size)
+        self._pcm = np.empty(chunk_size, dtype=np.int16)
+        self.clipped = 0
+
+    def _events(self, score):
+        """把乐谱转换成按起始采样点排序的 (起点, 终点, 频率, 时长, 力度) 列表"""
+        events = []
+        for note, start, duration, velocity in score:
+            freq = keys[note] if isinstance(note, str) else float(note)
+            n0 = int(round(start * self.Fs))
+            N = int(duration * self.Fs)
+            events.append((n0, n0 + N, freq, duration, velocity))
+        events.sort(key=lambda e: e[0])
+        return events
+
+    def render_chunks(self, score):
+        """
+        逐块产生混音结果
+
+        返回:
+            生成器，每次产生一个长度不超过 chunk_size 的 float64 数组，
+            该数组在下一次迭代时会被覆盖
+        """
+        events = self._events(score)
+        total = max((e[1] for e in events), default=0)
+        next_event = 0
+        active = []
+
+        for c0 in range(0, total, self.chunk_size):
+            c1 = min(c0 + self.chunk_size, total)
+            out = self._buf[:c1 - c0]
+            out[:] = 0
+
+            while next_event < len(events) and events[next_event][0] < c1:
+                active.append(events[next_event])
+                next_event += 1
+            active = [e for e in active if e[1] > c0]
+
+            for n0, n1, freq, duration, velocity in active:
+                note = self.bank.render(freq, duration)
+                a = max(n0, c0)
+                b = min(n1, c1)
+                out[a - c0:b - c0] += velocity * note[a - n0:b - n0]
+
+            if self.gain != 1.0:
+                out *= self.gain
+            yield out
+
+    def render(self, score):
+        """一次渲染整段乐谱，适合较短的曲子"""
+        return np.concatenate([chunk.copy() for chunk in self.render_chunks(score)] or [np.zeros(0)])
+
+    def write_wav(self, score, path):
+        """
+        把乐谱逐块渲染并写入16位单声道WAV文件
+
+        返回:
+            统计信息字典: 音频时长、CPU耗时、每秒CPU时间可渲染的音频秒数、削波点数
+        """
+        self.clipped = 0
+        cpu_start = time.process_time()
+        n_samples = 0
+        with wave.open(path, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.Fs)
+            for chunk in self.render_chunks(score):
+                n = len(chunk)
+                self.clipped += int(np.count_nonzero(np.abs(chunk) > 1.0))
+                np.clip(chunk, -1.0, 1.0, out=chunk)
+                chunk *= 32767
+                pcm = self._pcm[:n]
+                np.copyto(pcm, chunk, casting='unsafe')
+                wf.writeframes(pcm.tobytes())
+                n_samples += n
+        cpu = time.process_time() - cpu_start
+        audio_seconds = n_samples / self.Fs
+        return {
+            'audio_seconds': audio_seconds,
+            'cpu_seconds': cpu,
+            'realtime_factor': audio_seconds / cpu if cpu > 0 else float('inf'),
+            'clipped_samples': self.clipped,
+        }
+
+
+if __name__ == '__main__':
+    # 小星星，右手旋律加左手和弦，重复若干遍得到几分钟长的曲子
+    melody = ['C', 'C', 'G', 'G', 'A', 'A', 'G', 'F', 'F', 'E', 'E', 'D', 'D', 'C']
+    beats = [1, 1, 1, 1, 1, 1, 2, 1, 1, 1, 1, 1, 1, 2]
+    beat = 0.4
+
+    score = []
+    t0 = 0.0
+    for repeat in range(20):
+        t = t0
+        for note, b in zip(melody, beats):
+            score.append((note, t, b * beat * 1.5, 0.8))
+            t += b * beat
+        for i, chord in enumerate(['C', 'F', 'C', 'G']):
+            score.append((chord, t0 + i * 4 * beat, 4 * beat * 1.2, 0.4))
+        t0 = t
+
+    seq = Sequencer()
+    stats = seq.write_wav(score, 'sequencer_output.wav')
+    print(f"Rendered {len(score)} notes into sequencer_output.wav")
+    print(f"Audio: {stats['audio_seconds']:.1f} s, CPU: {stats['cpu_seconds']:.3f} s, "
+          f"{stats['realtime_factor']:.0f} s of audio per CPU second")
+    print(f"Note bank: {seq.bank.hits} hits, {seq.bank.misses} renders, clipped samples: {stats['clipped_samples']}")
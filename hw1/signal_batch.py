@@ -0,0 +1,136 @@
+"""
+批量参数扫描信号发生器
+
+校准时需要扫描成千上万组 (频率, 幅值, 相位)，逐组调用 sin_wave(Fs, N, A, F, P)
+或 DRGenerator.genData() 时 Python 调用开销占了大部分时间。
+这里把多组参数作为数组传入，用广播一次算出 (组数 × N) 的二维结果，
+并可按组分块计算以限制临时内存。
+信号类型编号与 DRGenerator 一致: 0=正弦波, 1=方波, 2=三角波, 3=白噪声。
+"""
+import numpy as np
+
+
+def _broadcast_params(A, F, P):
+    A, F, P = np.broadcast_arrays(np.atleast_1d(np.asarray(A, dtype=float)),
+                                  np.atleast_1d(np.asarray(F, dtype=float)),
+                                  np.atleast_1d(np.asarray(P, dtype=float)))
+    if A.ndim != 1:
+        raise ValueError("A, F, P 必须是标量或一维数组")
+    return A, F, P
+
+
+def _fill_block(st, t, A, F, P, out, rng):
+    """计算一块参数组的信号并写入 out (形状为 len(A) × len(t))"""
+    if st == 3:
+        rng.standard_normal(dtype=out.dtype, out=out)
+        out *= (A * 0.333)[:, None]
+        return out
+
+    # 相位(周) = F*t + P/360
+    np.multiply(F[:, None], t[None, :], out=out)
+    out += (P / 360.0)[:, None]
+    if st == 0:
+        out *= 2 * np.pi
+        np.sin(out, out=out)
+    elif st == 1:
+        out *= 2 * np.pi
+        np.sin(out, out=out)
+        np.sign(out, out=out)
+    elif st == 2:
+        np.mod(out, 1.0, out=out)
+        out -= 0.5
+        np.abs(out, out=out)
+        out *= 4
+        out -= 1
+    else:
+        raise ValueError(f"未知的信号类型: {st}")
+    out *= A[:, None]
+    return out
+
+
+def iter_wave_batch(st, Fs, N, A, F, P=0.0, chunk_size=256, dtype=np.float64, seed=None):
+    """
+    分块产生批量信号
+
+    参数:
+        st: 信号类型, 0=正弦波, 1=方波, 2=三角波, 3=白噪声
+        Fs: 采样频率
+        N: 每组的采样点数
+        A, F, P: 幅值、频率(Hz)、相位(度)，标量或一维数组，按广播规则对齐
+        chunk_size: 每块包含的参数组数
+        dtype: 输出数据类型
+
+    返回:
+        生成器，每次产生 (start, block)，block 形状为 (本块组数, N)，
+        对应第 start 组开始的参数；block 在下一次迭代时会被复用
+    """
+    A, F, P = _broadcast_params(A, F, P)
+    n_sets = len(A)
+    t = np.arange(N) / Fs
+    rng = np.random.default_rng(seed)
+    buf = np.empty((min(chunk_size, n_sets), N), dtype=dtype)
+    for start in range(0, n_sets, chunk_size):
+        stop = min(start + chunk_size, n_sets)
+        block = buf[:stop - start]
+        _fill_block(st, t, A[start:stop], F[start:stop], P[start:stop], block, rng)
+        yield start, block
+
+
+def wave_batch(st, Fs, N, A, F, P=0.0, chunk_size=None, out=None, dtype=np.float64, seed=None):
+    """
+    一次计算多组参数的信号
+
+    参数:
+        st: 信号类型, 0=正弦波, 1=方波, 2=三角波, 3=白噪声
+        Fs: 采样频率
+        N: 每组的采样点数
+        A, F, P: 幅值、频率(Hz)、相位(度)，标量或一维数组
+        chunk_size: 分块计算时每块的组数，None 表示一次算完
+        out: 可选的预分配输出数组，形状为 (组数, N)
+        dtype: out 为 None 时输出的数据类型
+
+    返回:
+        t: 时间轴，长度为N
+        Y: 形状为 (组数, N) 的信号数组
+    """
+    A, F, P = _broadcast_params(A, F, P)
+    n_sets = len(A)
+    t = np.arange(N) / Fs
+    if out is None:
+        out = np.empty((n_sets, N), dtype=dtype)
+    elif out.shape != (n_sets, N):
+        raise ValueError(f"out 的形状应为 {(n_sets, N)}, 实际为 {out.shape}")
+
+    rng = np.random.default_rng(seed)
+    step = n_sets if chunk_size is None else chunk_size
+    for start in range(0, n_sets, step):
+        stop = min(start + step, n_sets)
+        _fill_block(st, t, A[start:stop], F[start:stop], P[start:stop], out[start:stop], rng)
+    return t, out
+
+
+def sin_wave_batch(Fs, N, A, F, P=0.0, chunk_size=None, out=None, dtype=np.float64):
+    """sin_wave 的批量版本，返回 (t, Y)"""
+    return wave_batch(0, Fs, N, A, F, P, chunk_size=chunk_size, out=out, dtype=dtype)
+
+
+if __name__ == '__main__':
+    import time
+
+    Fs = 44100
+    N = 4096
+    F = np.linspace(100, 2000, 2000)
+    A = 0.8
+    P = 30
+
+    start = time.perf_counter()
+    rows = [0.8 * np.sin(2 * np.pi * f * np.arange(N) / Fs + P * np.pi / 180) for f in F]
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    t, Y = sin_wave_batch(Fs, N, A, F, P, chunk_size=256)
+    t_batch = time.perf_counter() - start
+
+    print(f"{len(F)} tones x {N} samples")
+    print(f"Per-call loop: {t_loop:.3f} s, batch: {t_batch:.3f} s, speedup {t_loop / t_batch:.1f}x")
+    print(f"Max difference: {np.max(np.abs(np.array(rows) - Y)):.2e}")
@@ -0,0 +1,147 @@
+"""
+相位连续的流式信号块发生器
+
+signal_generator_simple.py 中的波形函数每次都从 t=0 重新计算整段数据，
+连续调用时每一块都从零相位开始，块边界处会出现跳变。
+这里用一个相位累加器(以"周"为单位)记录当前相位，每次输出固定长度的一块，
+并直接写入调用者预先分配好的缓冲区，长时间运行时不再逐块分配内存。
+"""
+import numpy as np
+
+WAVE_TYPES = ('sine', 'square', 'triangle', 'sawtooth', 'noise')
+
+
+class SignalStream:
+    """
+    流式信号发生器
+
+    参数:
+        Fs: 采样频率
+        block_size: 每块的采样点数
+        A: 幅值
+        F: 频率 (Hz)
+        P: 初始相位 (度)
+        wave: 波形类型, 'sine'/'square'/'triangle'/'sawtooth'/'noise'
+        seed: 白噪声的随机种子
+    """
+
+    def __init__(self, Fs, block_size, A=1.0, F=100.0, P=0.0, wave='sine', seed=None):
+        if wave not in WAVE_TYPES:
+            raise ValueError(f"未知的波形类型: {wave}")
+        self.Fs = Fs
+        self.block_size = block_size
+        self.A = A
+        self.F = F
+        self.wave = wave
+        # 相位累加器，单位为周(0~1)，保留在[0,1)内以免长时间运行后丢失精度
+        self.phase = (P / 360.0) % 1.0
+        self.samples_done = 0
+        self._k = np.arange(block_size, dtype=np.float64)
+        self._buf = np.empty(block_size, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def set_frequency(self, F):
+        """修改频率，相位从当前位置继续，不产生跳变"""
+        self.F = F
+
+    def set_amplitude(self, A):
+        self.A = A
+
+    def reset(self, P=0.0):
+        self.phase = (P / 360.0) % 1.0
+        self.samples_done = 0
+
+    def read_into(self, out):
+        """
+        生成下一块数据并写入 out
+
+        参数:
+            out: 长度为 block_size 的一维数组(float64或float32)
+
+        返回:
+            out
+        """
+        if out.shape != (self.block_size,):
+            raise ValueError(f"缓冲区长度应为 {self.block_size}, 实际为 {out.shape}")
+
+        buf = self._buf
+        inc = self.F / self.Fs
+
+        if self.wave == 'noise':
+            self._rng.standard_normal(out=buf)
+            np.multiply(buf, self.A * 0.333, out=out)
+        else:
+            # buf = 当前块每个采样点的相位(周)
+            np.multiply(self._k, inc, out=buf)
+            buf += self.phase
+
+            if self.wave == 'sine':
+                buf *= 2 * np.pi
+                np.sin(buf, out=buf)
+            elif self.wave == 'square':
+                buf *= 2 * np.pi
+                np.sin(buf, out=buf)
+                np.sign(buf, out=buf)
+            elif self.wave == 'triangle':
+                np.mod(buf, 1.0, out=buf)
+                buf -= 0.5
+                np.abs(buf, out=buf)
+                buf *= 4
+                buf -= 1
+            elif self.wave == 'sawtooth':
+                np.mod(buf, 1.0, out=buf)
+                buf *= 2
+                buf -= 1
+            np.multiply(buf, self.A, out=out)
+
+            self.phase = (self.phase + self.block_size * inc) % 1.0
+
+        self.samples_done += self.block_size
+        return out
+
+    def blocks(self, out=None, dtype=np.float64):
+        """
+        无限产生数据块的生成器
+
+        参数:
+            out: 预分配缓冲区，为 None 时内部分配一次并反复使用
+            dtype: 内部分配缓冲区时使用的数据类型
+
+        返回:
+            每次迭代返回同一个缓冲区，调用者应在取下一块之前用完当前数据
+        """
+        if out is None:
+            out = np.empty(self.block_size, dtype=dtype)
+        while True:
+            yield self.read_into(out)
+
+    def __iter__(self):
+        return self.blocks()
+
+
+if __name__ == '__main__':
+    import time
+
+    Fs = 44100
+    block_size = 1024
+    stream = SignalStream(Fs, block_size, A=1.0, F=1000.0, P=0, wave='sine')
+
+    # 与一次性计算的整段信号对比，检查块边界处相位连续
+    n_blocks = 50
+    out = np.empty(block_size)
+    joined = np.empty(n_blocks * block_size)
+    for i, block in zip(range(n_blocks), stream.blocks(out)):
+        joined[i * block_size:(i + 1) * block_size] = block
+    t = np.arange(n_blocks * block_size) / Fs
+    ref = np.sin(2 * np.pi * 1000.0 * t)
+    print(f"Max deviation from one-shot sine over {n_blocks} blocks: {np.max(np.abs(joined - ref)):.2e}")
+
+    # 吞吐量测试
+    stream.reset()
+    n_blocks = 5000
+    start = time.perf_counter()
+    for _, block in zip(range(n_blocks), stream.blocks(out)):
+        pass
+    elapsed = time.perf_counter() - start
+    seconds = n_blocks * block_size / Fs
+    print(f"Generated {seconds:.1f} s of audio in {elapsed:.3f} s ({seconds / elapsed:.0f}x real time)")
@@ -1,25 +1,39 @@
+import ctypes
 import os
 import sys
 
-# 设置库路径以避免Qt库冲突 - 需要在加载Qt之前重新启动进程
-conda_lib_path = '/home/aetly/miniconda3/envs/homework_for_signal/lib'
-current_ld_path = os.environ.get('LD_LIBRARY_PATH', '')
+# 设置库路径以避免Qt库冲突
+# 原来的做法是修改 LD_LIBRARY_PATH 后用 os.execv 重新启动整个解释器，启动时间翻倍。
+# 动态链接器只在进程启动时读取 LD_LIBRARY_PATH，所以这里改为在导入 PyQt5 之前
+# 用 RTLD_GLOBAL 直接预加载 conda 环境中的库，之后 PyQt5 按 soname 查找时会复用它们。
+conda_lib_path = os.path.join(os.environ.get('CONDA_PREFIX', '/home/aetly/miniconda3/envs/homework_for_signal'), 'lib')
+preload_libs = ['libstdc++.so.6', 'libgcc_s.so.1', 'libQt5Core.so.5', 'libQt5Gui.so.5',
+                'libQt5DBus.so.5', 'libQt5Widgets.so.5', 'libQt5XcbQpa.so.5']
 
-# 如果LD_LIBRARY_PATH还没有设置conda路径，则重新执行程序
-if conda_lib_path not in current_ld_path:
-    if current_ld_path:
-        os.environ['LD_LIBRARY_PATH'] = f"{conda_lib_path}:{current_ld_path}"
-    else:
-        os.environ['LD_LIBRARY_PATH'] = conda_lib_path
-    # 重新执行当前程序
-    os.execv(sys.executable, [sys.executable] + sys.argv)
+def preload_conda_libs():
+    if not os.path.isdir(conda_lib_path):
+        return
+    plugin_path = os.path.join(conda_lib_path, '..', 'plugins')
+    if os.path.isdir(plugin_path):
+        os.environ.setdefault('QT_PLUGIN_PATH', os.path.abspath(plugin_path))
+    for name in preload_libs:
+        path = os.path.join(conda_lib_path, name)
+        if os.path.exists(path):
+            try:
+                ctypes.CDLL(path, mode=ctypes.RTLD_GLOBAL)
+            except OSError as e:
+                print(f"Failed to preload {name}: {e}")
 
-import numpy as np
+preload_conda_libs()
+
+# 下面的导入在启动时都要用到(窗口和画布在模块加载时就创建)，没有可以推迟到函数中的重型导入
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
 
+from plot_renderer import SineRenderer
+
 def setFigure(win, x0, y0, w, h):
     wdi = QWidget(win)
     wdi.setGeometry(x0, y0, w, h)
@@ -32,26 +46,11 @@ def setFigure(win, x0, y0, w, h):
     return fig, canvas
 
 def update_signal():
-    Fs = 44100
-    N = 2000
-    dt = 1.0 / Fs
-    t = np.arange(N) * dt
-
     F = freq_slider.value()
     A = amp_slider.value() / 100.0
     P = phase_slider.value()
 
-    y = A * np.sin(2 * np.pi * F * t + P * np.pi / 180)
-
-    mFig.clear()
-    ax = mFig.add_subplot(111)
-    ax.plot(t, y, 'b-', linewidth=1.5)
-    ax.set_xlabel('Time (s)')
-    ax.set_ylabel('Amplitude')
-    ax.set_title(f'Sine Wave: F={F}Hz, A={A:.2f}, Phase={P}deg')
-    ax.grid(True)
-    ax.set_ylim(-1.2, 1.2)
-    mCanvas.draw()
+    renderer.request(F, A, P)
 
     freq_label.setText(f'Frequency: {F} Hz')
     amp_label.setText(f'Amplitude: {A:.2f}')
@@ -92,6 +91,7 @@ phase_slider.setValue(0)
 phase_slider.valueChanged.connect(update_signal)
 
 mFig, mCanvas = setFigure(win, 20, 140, 860, 490)
+renderer = SineRenderer(mFig, mCanvas, Fs=44100, N=2000, fps=30)
 update_signal()
 
 win.show()
@@ -1,38 +1,21 @@
 import tkinter as tk
-import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
+from plot_renderer import SineRenderer
+
 def getfigure(win, x0, y0, w, h):
-    px = 1 / plt.rcParams['figure.dpi']
-    fig = plt.Figure(figsize=(w * px, h * px))
+    px = 1 / matplotlib.rcParams['figure.dpi']
+    fig = Figure(figsize=(w * px, h * px))
     chart = FigureCanvasTkAgg(fig, win)
     chart.get_tk_widget().place(x=x0, y=y0)
     ax = fig.add_subplot(111)
     fig.tight_layout()
-    return chart, ax
+    return fig, chart, ax
 
 def update_signal():
-    global chart1, ax1
-    Fs = 44100
-    N = 2000
-    dt = 1.0 / Fs
-    t = np.arange(N) * dt
-
-    F = freq_scale.get()
-    A = amp_scale.get()
-    P = phase_scale.get()
-
-    y = A * np.sin(2 * np.pi * F * t + P * np.pi / 180)
-
-    ax1.clear()
-    ax1.plot(t, y, 'b-', linewidth=1.5)
-    ax1.set_xlabel('Time (s)')
-    ax1.set_ylabel('Amplitude')
-    ax1.set_title(f'Sine Wave: F={F}Hz, A={A:.2f}, Phase={P}deg')
-    ax1.grid(True)
-    ax1.set_ylim(-1.2, 1.2)
-    chart1.draw()
+    renderer.request(freq_scale.get(), amp_scale.get(), phase_scale.get())
 
 root = tk.Tk()
 root.geometry('900x650')
@@ -54,7 +37,9 @@ phase_scale = tk.Scale(root, from_=0, to=180, orient=tk.HORIZONTAL, command=lamb
 phase_scale.place(x=150, y=130, width=700, height=50)
 phase_scale.set(0)
 
-chart1, ax1 = getfigure(root, 20, 200, 860, 430)
+fig1, chart1, ax1 = getfigure(root, 20, 200, 860, 430)
+renderer = SineRenderer(fig1, chart1, ax1, Fs=44100, N=2000, fps=30)
+chart1.draw()
 update_signal()
 
 root.mainloop()
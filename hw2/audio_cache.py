@@ -0,0 +1,257 @@
+"""
+解码后音频的磁盘缓存
+
+在 hw2_audio_complete.py 中每次重新打开同一个MP3，都要再做一遍完整的解码和重采样，
+而同样的参考录音一天要回放几十次。DecodedAudioCache 把解码后的 float32 PCM 保存为 .npy 文件，
+以后打开时用内存映射直接读取(不复制、不解码)。
+
+缓存键为 文件内容的哈希 + 目标采样率 + 声道布局(单声道/原声道)，文件改名或移动后仍然命中，
+内容改变后自动失效。为了不在每次打开时都读一遍整个文件算哈希，索引文件记录
+(路径, 大小, 修改时间) -> 哈希，文件没有变化时直接查表。
+
+缓存目录有总大小上限，超过时按最近使用时间(LRU，命中时更新文件的修改时间)删除最旧的条目。
+record() 包装解码数据块的生成器，边播放边直接写入 .npy 临时文件(预留定长文件头，
+总长度在结束后才知道，最后回填)，播放完整个文件后改名加入缓存。
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hw2_audio')
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+HASH_CHUNK = 1 << 20
+
+# .npy 1.0 格式的文件头: 魔数、版本、头长度(uint16)、用空格补齐的字典，以换行结束。
+# 预留的长度足够放下任何 float32 数组的形状，并保持数据按64字节对齐
+NPY_HEADER_BYTES = 128
+
+
+def file_hash(path):
+    """按块读取计算文件内容的哈希"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fp:
+        while True:
+            chunk = fp.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def npy_header(shape, dtype=np.float32):
+    """生成长度固定为 NPY_HEADER_BYTES 的 .npy 文件头"""
+    d = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False,
+              'shape': tuple(int(s) for s in shape)})
+    prefix = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    header_len = NPY_HEADER_BYTES - len(prefix) - 2
+    text = d.ljust(header_len - 1).encode('latin1') + b'\n'
+    if len(text) != header_len:
+        raise ValueError(f"shape {shape} does not fit in the reserved .npy header")
+    return prefix + header_len.to_bytes(2, 'little') + text
+
+
+class DecodedAudioCache:
+    """
+    解码音频缓存
+
+    参数:
+        cache_dir: 缓存目录，默认为环境变量 HW2_AUDIO_CACHE 或 ~/.cache/hw2_audio
+        max_bytes: 缓存目录中 .npy 文件的总大小上限
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or os.environ.get('HW2_AUDIO_CACHE') or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, 'index.json')
+        self._index = self._load_index()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, encoding='utf-8') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = self._index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fp:
+            json.dump(self._index, fp)
+        os.replace(tmp, self._index_path)
+
+    def content_hash(self, path):
+        """文件内容哈希；大小和修改时间没有变化时直接使用索引中的记录"""
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self._index.get(key)
+        if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        digest = file_hash(path)
+        self._index[key] = [st.st_size, st.st_mtime_ns, digest]
+        self._save_index()
+        return digest
+
+    def entry_path(self, path, sr, mono=True):
+        layout = 'mono' if mono else 'multi'
+        return os.path.join(self.cache_dir, f"{self.content_hash(path)}_{int(sr)}_{layout}.npy")
+
+    def lookup(self, path, sr, mono=True):
+        """
+        查找缓存
+
+        返回:
+            命中时为只读的内存映射数组(单声道为一维，否则为 (帧数, 声道数))，否则为 None
+        """
+        entry = self.entry_path(path, sr, mono)
+        if not os.path.exists(entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        os.utime(entry)  # 记录最近使用时间
+        return np.load(entry, mmap_mode='r')
+
+    def record(self, path, sr, mono, blocks):
+        """
+        包装解码数据块的生成器: 原样给出每一块，同时写入临时文件；
+        生成器完整结束后转换成 .npy 加入缓存，中途停止则丢弃
+
+        参数:
+            blocks: float32 数据块的可迭代对象(例如 AudioFileReader.blocks())
+        """
+        entry = self.entry_path(path, sr, mono)
+        tmp = entry + f'.{os.getpid()}.tmp'
+        n = 0
+        shape_tail = ()
+        completed = False
+        try:
+            with open(tmp, 'wb') as fp:
+                fp.write(npy_header((0,)))  # 占位，结束后回填实际形状
+                for blk in blocks:
+                    blk = np.ascontiguousarray(blk, dtype=np.float32)
+                    shape_tail = blk.shape[1:]
+                    fp.write(blk.data)
+                    n += len(blk)
+                    yield blk
+                fp.seek(0)
+                fp.write(npy_header((n,) + shape_tail))
+            completed = True
+        finally:
+            if completed:
+                os.replace(tmp, entry)
+                self.evict(keep=entry)
+            elif os.path.exists(tmp):
+                os.remove(tmp)
+
+    def store(self, path, sr, data, mono=True):
+        """直接保存一段已经解码好的数据"""
+        for _ in self.record(path, sr, mono, [data]):
+            pass
+        # 直接打开刚写入的文件，不计入命中次数
+        return np.load(self.entry_path(path, sr, mono), mmap_mode='r')
+
+    def entries(self):
+        """缓存条目列表 [(路径, 大小, 最近使用时间)]，最旧的在前"""
+        items = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npy'):
+                p = os.path.join(self.cache_dir, name)
+                st = os.stat(p)
+                items.append((p, st.st_size, st.st_mtime))
+        items.sort(key=lambda e: e[2])
+        return items
+
+    def size(self):
+        return sum(e[1] for e in self.entries())
+
+    def evict(self, keep=None):
+        """
+        删除最久未使用的条目，直到总大小不超过上限(keep 指定的条目不删除)，
+        并从索引中去掉已经没有缓存条目的文件记录
+        """
+        items = self.entries()
+        total = sum(e[1] for e in items)
+        removed = 0
+        for p, size, _ in items:
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            # 已经内存映射的文件删除后映射仍然有效(POSIX)；Windows 上删除失败时跳过
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self._prune_index()
+        return removed
+
+    def _prune_index(self):
+        cached = {os.path.basename(p).split('_')[0] for p, _, _ in self.entries()}
+        stale = [k for k, e in self._index.items() if e[2] not in cached]
+        for k in stale:
+            del self._index[k]
+        if stale:
+            self._save_index()
+
+
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+    import time
+
+    from scipy.io import wavfile
+
+    from audio_reader import AudioFileReader
+
+    work = tempfile.mkdtemp()
+    try:
+        # 2分钟 48kHz 立体声录音，分析时重采样到 44.1kHz 单声道
+        t = np.arange(48000 * 120) / 48000
+        pcm = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+        path = os.path.join(work, 'reference.wav')
+        wavfile.write(path, 48000, np.column_stack([pcm, pcm]))
+        del t, pcm
+
+        cache = DecodedAudioCache(os.path.join(work, 'cache'), max_bytes=50 * 1024 ** 2)
+
+        start = time.perf_counter()
+        y = cache.lookup(path, 44100)
+        assert y is None
+        reader = AudioFileReader(path, sr=44100)
+        n = sum(len(b) for b in cache.record(path, 44100, True, reader.blocks()))
+        t_first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y = cache.lookup(path, 44100)
+        t_hit = time.perf_counter() - start
+        print(f"Decode + resample + cache: {t_first * 1e3:.0f} ms ({n} samples); "
+              f"cached open: {t_hit * 1e3:.2f} ms ({type(y).__name__}, {y.dtype}, {y.shape})")
+
+        # 改名后仍然命中
+        moved = os.path.join(work, 'renamed.wav')
+        shutil.copy2(path, moved)
+        print(f"Renamed copy hits cache: {cache.lookup(moved, 44100) is not None}")
+
+        # 超过大小上限时淘汰最久未使用的条目
+        for sr in (8000, 16000, 22050, 32000):
+            cache.store(path, sr, AudioFileReader(path, sr=sr).read_all())
+        print(f"Entries after adding 4 more rates with a 50 MB cap: "
+              f"{[os.path.basename(e[0]).split('_')[1] for e in cache.entries()]}, "
+              f"total {cache.size() / 1e6:.1f} MB, hits {cache.hits}")
+
+        # 另一个文件的条目把它们全部挤出后，索引中不再保留两个旧文件的记录
+        other = os.path.join(work, 'other.wav')
+        wavfile.write(other, 44100, (np.ones(44100 * 60 * 5) * 1000).astype(np.int16))
+        cache.store(other, 44100, AudioFileReader(other, sr=44100).read_all())
+        with open(os.path.join(cache.cache_dir, 'index.json'), encoding='utf-8') as fp:
+            print(f"Index after evicting every entry of reference.wav: "
+                  f"{sorted(os.path.basename(k) for k in json.load(fp))}")
+    finally:
+        shutil.rmtree(work)
@@ -0,0 +1,330 @@
+"""
+回调方式的音频采集和环形缓冲区
+
+MicThread 原来调用阻塞的 stream.read(M, exception_on_overflow=False)，在同一个循环里做FFT和画图，
+最后还 time.sleep(0.05)：处理一慢，声卡缓冲区就溢出，数据被悄悄丢掉。
+这里改为 PyAudio 的回调方式: 声卡驱动线程每凑满一块就调用回调，回调只把 int16 数据换算后
+写入预分配的 numpy 环形缓冲区，立即返回；分析线程按自己的节奏从环形缓冲区读取。
+只要分析的平均速度跟得上，FFT或画图偶尔变慢也不会丢失采样。
+
+RingBuffer 是单生产者单消费者的环形缓冲区，不加锁，按顺序锁(seqlock)的方式校验:
+写入方复制数据之前先把"正在写"计数推进到 写计数+n，复制完成后再推进写计数；
+读取方读完后才推进读计数(计数都只增不减，Python 中整数赋值是原子的)。
+读取方只读取写计数以内的数据，复制完成后重新读取"正在写"计数，
+如果复制的区间可能已被(或正在被)覆盖，按溢出处理并重读。
+    overruns:  写入方追上读取方，未读的数据被覆盖(丢失的采样点数)
+    underruns: 读取方等待超时仍没有足够的数据(采集停顿)的次数
+多声道采集时声卡给出的交错 int16 数据按 (帧数, 声道数) 的视图写入，环形缓冲区每帧一行；
+dtype=np.int16 时回调中只复制原始数据，不做换算；读到浮点数组时才乘以 1/32768(读到 int16 数组时原样复制，
+可以直接交给 multichannel.MultiChannelEngine)。
+
+SyntheticCapture 用一个后台线程按实际采样率从 signal_source.SyntheticSource 取出测试信号，
+像声卡一样换算成 int16 后写入同样的环形缓冲区，在没有麦克风的机器上也可以测试整个分析流程。
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    单生产者单消费者环形缓冲区
+
+    参数:
+        capacity: 容量(采样点数，多声道时为帧数)
+        dtype: 数据类型
+        channels: 声道数；大于1时每一帧为一行，读写的数据形状为 (帧数, 声道数)
+    """
+
+    def __init__(self, capacity, dtype=np.float32, channels=1):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        shape = (self.capacity,) if channels == 1 else (self.capacity, channels)
+        self._buf = np.zeros(shape, dtype=self.dtype)
+        self._written = 0  # 累计写入完成的采样点数(只由写入方修改)
+        self._writing = 0  # 写入方正在写的数据的末尾位置，复制数据之前推进(只由写入方修改)
+        self._read = 0  # 累计读取的采样点数(只由读取方修改)
+        self.overruns = 0
+        self.overrun_events = 0
+        self.underruns = 0
+
+    @property
+    def available(self):
+        """可以读取的采样点数(不超过容量)"""
+        return min(self._written - self._read, self.capacity)
+
+    @property
+    def total_written(self):
+        return self._written
+
+    def write(self, samples, scale=None):
+        """
+        写入数据(生产者调用，不阻塞)
+
+        参数:
+            samples: 一维数据(多声道时为 (帧数, 声道数))，长度可以超过容量(只保留最后 capacity 个点)
+            scale: 可选的比例系数，例如 int16 数据乘以 1/32768
+        """
+        n = len(samples)
+        end = self._written + n
+        # 先公布将要覆盖的范围，读取方据此判断复制的数据是否有效
+        self._writing = end
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        start = (end - n) % self.capacity
+        first = min(n, self.capacity - start)
+        dst1 = self._buf[start:start + first]
+        dst2 = self._buf[:n - first]
+        if scale is None or self.dtype.kind in 'iu':
+            dst1[...] = samples[:first]
+            dst2[...] = samples[first:]
+        else:
+            # 比例系数取缓冲区的类型: int16 * float32 直接按单精度计算，不经过 float64 中间结果
+            scale = self.dtype.type(scale)
+            np.multiply(samples[:first], scale, out=dst1, casting='unsafe')
+            np.multiply(samples[first:], scale, out=dst2, casting='unsafe')
+        self._written = end
+
+    def _copy(self, pos, out):
+        n = len(out)
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        src1 = self._buf[start:start + first]
+        src2 = self._buf[:n - first]
+        if self.dtype.kind == 'i' and out.dtype.kind == 'f':
+            # 整数缓冲区读到浮点数组: 换算成 ±1 范围
+            scale = out.dtype.type(1.0 / -np.iinfo(self.dtype).min)
+            np.multiply(src1, scale, out=out[:first])
+            np.multiply(src2, scale, out=out[first:])
+        else:
+            out[:first] = src1
+            out[first:] = src2
+
+    def _valid(self, pos):
+        """从 pos 开始复制的数据没有被覆盖(复制之后调用)"""
+        return self._writing - pos <= self.capacity
+
+    def _skip_lost(self):
+        """读取方落后超过一个容量时，跳过已被(或正在被)覆盖的数据并计数"""
+        lost = self._writing - self._read - self.capacity
+        if lost > 0:
+            self.overruns += lost
+            self.overrun_events += 1
+            self._read += lost
+
+    def read(self, out):
+        """
+        按顺序读取 len(out) 个最早的未读采样点(消费者调用)
+
+        返回:
+            成功时为 True；数据不够时不读取，返回 False
+        """
+        n = len(out)
+        while True:
+            self._skip_lost()
+            if self._written - self._read < n:
+                return False
+            pos = self._read
+            self._copy(pos, out)
+            # 复制期间写入方可能已经开始覆盖这段数据: 重新读取"正在写"计数校验
+            if self._valid(pos):
+                self._read = pos + n
+                return True
+
+    def read_wait(self, out, timeout=1.0, poll=0.002):
+        """
+        等待直到有 len(out) 个未读采样点再读取；超时计一次 underrun 并返回 False
+        """
+        deadline = time.perf_counter() + timeout
+        while not self.read(out):
+            if time.perf_counter() >= deadline:
+                self.underruns += 1
+                return False
+            time.sleep(poll)
+        return True
+
+    def latest(self, out):
+        """
+        复制最近的 len(out) 个采样点，不改变读取位置(用于显示)
+
+        返回:
+            复制的点数(刚开始采集时可能少于 len(out))
+        """
+        while True:
+            end = self._written
+            n = min(len(out), end, self.capacity)
+            self._copy(end - n, out[len(out) - n:])
+            if self._valid(end - n):
+                return n
+
+    def reset(self):
+        self._read = self._written
+        self.overruns = self.overrun_events = self.underruns = 0
+
+    def stats(self):
+        return {'written': self._written, 'read': self._read, 'available': self.available,
+                'overruns': self.overruns, 'overrun_events': self.overrun_events,
+                'underruns': self.underruns}
+
+
+class MicCapture:
+    """
+    回调方式的麦克风采集
+
+    参数:
+        Fs: 采样频率
+        block: 每次回调的帧数(越小延迟越低)
+        seconds: 环形缓冲区能容纳的秒数
+        device: 输入设备编号，None 表示默认设备
+        dtype: 环形缓冲区的数据类型；np.int16 时原样保存声卡数据，不做换算
+        channels: 声道数；多声道时声卡给出的交错数据按 (帧数, 声道数) 的视图写入，不重排
+    """
+
+    def __init__(self, Fs=44100, block=1024, seconds=10.0, device=None, dtype=np.float32, channels=1):
+        self.Fs = Fs
+        self.block = block
+        self.device = device
+        self.channels = channels
+        self.ring = RingBuffer(int(Fs * seconds), dtype, channels)
+        self.device_overflows = 0
+        self._pa = None
+        self._stream = None
+        # PyAudio 的常量在 start() 中读取一次，回调中不再查找模块
+        self._overflow_flag = 0
+        self._continue = 0
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & self._overflow_flag:
+            self.device_overflows += 1
+        pcm = np.frombuffer(in_data, np.int16)
+        if self.channels > 1:
+            pcm = pcm.reshape(-1, self.channels)
+        self.ring.write(pcm, scale=1 / 32768.0)
+        return None, self._continue
+
+    def start(self):
+        import pyaudio
+        self._overflow_flag = pyaudio.paInputOverflow
+        self._continue = pyaudio.paContinue
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=self.channels, rate=self.Fs, input=True,
+                                     frames_per_buffer=self.block, input_device_index=self.device,
+                                     stream_callback=self._callback)
+        self._stream.start_stream()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+    def stats(self):
+        s = self.ring.stats()
+        s['device_overflows'] = self.device_overflows
+        return s
+
+
+class SyntheticCapture:
+    """
+    代替麦克风的测试信号源: 后台线程按实际采样率逐块产生信号并写入环形缓冲区
+
+    参数:
+        Fs: 采样频率
+        block: 每块的点数(相当于声卡回调的块大小)
+        seconds: 环形缓冲区能容纳的秒数
+        freq, amp: 正弦信号的频率和幅值
+        noise: 叠加白噪声的标准差
+        realtime: False 时不等待，尽快产生数据(用于压力测试)
+    """
+
+    def __init__(self, Fs=44100, block=1024, seconds=10.0, freq=1000.0, amp=0.5, noise=0.01,
+                 realtime=True, seed=None, dtype=np.float32):
+        from signal_source import SyntheticSource, SINE
+        self.Fs = Fs
+        self.block = block
+        self.realtime = realtime
+        self.source = SyntheticSource(Fs, SINE, freq=freq, amp=amp, noise=noise, seed=seed)
+        self.ring = RingBuffer(int(Fs * seconds), dtype)
+        self.device_overflows = 0
+        self._running = False
+        self._thread = None
+        # 与声卡一样产生 int16 数据，写入时再换算
+        self._x = np.empty(block)
+        self._pcm = np.empty(block, dtype=np.int16)
+
+    def _next_block(self):
+        x = self._x
+        self.source.read_into(x)
+        x *= 32768.0
+        np.clip(x, -32768, 32767, out=x)
+        self._pcm[:] = x
+        return self._pcm
+
+    def _run(self):
+        period = self.block / self.Fs
+        next_time = time.perf_counter()
+        while self._running:
+            self.ring.write(self._next_block(), scale=1 / 32768.0)
+            if self.realtime:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        s = self.ring.stats()
+        s['device_overflows'] = self.device_overflows
+        return s
+
+
+if __name__ == '__main__':
+    Fs = 44100
+    M = 4096
+
+    # 实时产生3秒数据，分析线程处理前10块时每块故意停顿(模拟很慢的FFT和画图)，
+    # 处理不过来的数据留在环形缓冲区中，之后追上，不丢采样
+    cap = SyntheticCapture(Fs, block=1024, seconds=5.0, freq=1000.0, seed=0)
+    buf = np.empty(M, dtype=np.float32)
+    blocks = []
+    cap.start()
+    t_end = time.perf_counter() + 3.0
+    while time.perf_counter() < t_end:
+        if cap.ring.read_wait(buf, timeout=0.5):
+            blocks.append(buf.copy())
+            if len(blocks) <= 10:
+                time.sleep(0.15)
+    cap.stop()
+    while cap.ring.read(buf):
+        blocks.append(buf.copy())
+    s = cap.stats()
+    # 所有块首尾相接后应当是连续的正弦信号
+    x = np.concatenate(blocks)
+    ref = 0.5 * np.sin(2 * np.pi * 1000.0 * np.arange(len(x)) / Fs)
+    print(f"Slow consumer: read {len(x)} of {s['written']} samples, overruns={s['overruns']}, "
+          f"underruns={s['underruns']}, max deviation from continuous sine={np.max(np.abs(x - ref)):.3f}")
+
+    # 缓冲区太小时: 覆盖的数据被计为 overrun，读取方跳过并继续
+    cap = SyntheticCapture(Fs, block=1024, seconds=0.2, seed=0)
+    cap.start()
+    time.sleep(0.5)
+    cap.ring.read(buf)
+    cap.stop()
+    s = cap.stats()
+    print(f"Undersized ring: overruns={s['overruns']} samples in {s['overrun_events']} event(s)")
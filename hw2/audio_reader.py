@@ -0,0 +1,280 @@
+"""
+流式音频文件读取
+
+MP3Thread 原来调用 librosa.load(self.filepath, sr=44100, mono=True)，先把整个文件解码并重采样到内存，
+才能显示第一帧。两小时的现场录音要占用1GB以上内存，并等待很长时间。
+AudioFileReader 边解码边输出数据块:
+    WAV:  用 scipy.io.wavfile 内存映射读取，按块切片，不解码整个文件
+    其他: 有 soundfile 时用 soundfile.blocks 分块解码，否则用 audioread(librosa 的解码后端)
+每块单独做声道平均(转单声道)和换算成 float32；只有采样率不同时才重采样，
+StreamResampler 保留块与块之间的滤波器历史，结果与对整个文件调用 resample_poly 相同。
+内存占用只与块大小有关，与文件长度无关。
+
+frame_blocks() 按 MP3Thread/Spectrogram 的分帧方式(第i帧从 i*hop 开始，末尾补零)
+一次给出若干帧的不复制视图，可以直接交给 Spectrogram 批量变换。
+"""
+import os
+
+import numpy as np
+import scipy.signal
+
+from spectrogram import frame_view
+
+
+def to_float32(blk, mono=False):
+    """
+    把一块 PCM 数据换算成 ±1 范围的 float32
+
+    参数:
+        blk: 整数(有符号，或8位WAV那样的无符号)或浮点数据，一维或 (帧数, 声道数)
+        mono: 是否把多声道平均成单声道
+    """
+    if np.issubdtype(blk.dtype, np.integer):
+        info = np.iinfo(blk.dtype)
+        if info.min == 0:  # 8位WAV是无符号数
+            half = (info.max + 1) / 2
+            x = (blk.astype(np.float32) - np.float32(half)) / np.float32(half)
+        else:
+            x = blk.astype(np.float32) * np.float32(1.0 / -info.min)
+    else:
+        x = blk.astype(np.float32, copy=False)
+    if x.ndim > 1 and mono:
+        x = x.mean(axis=1) if x.shape[1] > 1 else x[:, 0]
+    return x
+
+
+class StreamResampler:
+    """
+    分块多相重采样，结果与 scipy.signal.resample_poly(整个信号, up, down) 一致
+
+    参数:
+        sr_in, sr_out: 输入和输出采样率
+    """
+
+    def __init__(self, sr_in, sr_out):
+        g = np.gcd(int(sr_in), int(sr_out))
+        self.up = int(sr_out) // g
+        self.down = int(sr_in) // g
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        # 与 resample_poly 默认的滤波器相同，只设计一次
+        self.taps = scipy.signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+        # 滤波器在输入采样点上的半长度，取整到 down 的倍数，使每次输出的起点对齐
+        pad = -(-half_len // self.up) + 1
+        self.pad = -(-pad // self.down) * self.down
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._started = False
+
+    def _run(self, buf):
+        return scipy.signal.resample_poly(buf, self.up, self.down, window=self.taps).astype(np.float32)
+
+    def process(self, x):
+        """
+        输入一块数据，返回已经可以确定的输出(滤波器需要 pad 个后续采样点，所以输出会延迟)
+        """
+        if not self._started:
+            # 第一块之前相当于补零，与 resample_poly 对信号两端的处理相同(多声道时按列处理)
+            self._buf = np.zeros((self.pad,) + np.shape(x)[1:], dtype=np.float32)
+            self._started = True
+        buf = np.concatenate([self._buf, np.asarray(x, dtype=np.float32)])
+        # buf[0] 对应已输出部分之前 pad 个点；可以输出 buf[pad : n_valid] 对应的部分
+        n_valid = (len(buf) - self.pad) // self.down * self.down
+        if n_valid <= self.pad:
+            self._buf = buf
+            return np.zeros(0, dtype=np.float32)
+        y = self._run(buf[:n_valid + self.pad])  # resample_poly 沿第0维(时间)
+        out = y[self.pad * self.up // self.down:n_valid * self.up // self.down]
+        self._buf = buf[n_valid - self.pad:]
+        return out
+
+    def flush(self):
+        """输入结束，输出剩余部分"""
+        if not self._started:
+            return np.zeros(0, dtype=np.float32)
+        buf = self._buf
+        n_in = len(buf) - self.pad  # 尚未输出的输入点数
+        y = self._run(buf)
+        start = self.pad * self.up // self.down
+        n_out = -(-n_in * self.up // self.down)
+        self._started = False
+        return y[start:start + n_out]
+
+
+class AudioFileReader:
+    """
+    流式音频文件读取器
+
+    参数:
+        path: 音频文件路径
+        sr: 输出采样率，None 表示保持原采样率
+        mono: 是否转换为单声道
+        block: 每次解码的帧数(原采样率下)
+    """
+
+    def __init__(self, path, sr=44100, mono=True, block=65536):
+        self.path = path
+        self.mono = mono
+        self.block = block
+        self._wav = None
+        self._backend = None
+        if path.lower().endswith('.wav'):
+            try:
+                from scipy.io import wavfile
+                self.native_sr, self._wav = wavfile.read(path, mmap=True)
+                self._backend = 'wav'
+            except (ValueError, NotImplementedError):
+                # scipy 不支持的 WAV 编码(例如24位整数无法内存映射)交给通用解码器
+                pass
+        if self._backend is None:
+            self._open_decoder()
+        if self._backend == 'wav':
+            self.channels = 1 if self._wav.ndim == 1 else self._wav.shape[1]
+            self.native_frames = len(self._wav)
+        self.sr = self.native_sr if sr is None else sr
+        self.duration = self.native_frames / self.native_sr if self.native_frames is not None else None
+
+    @property
+    def needs_decode(self):
+        """为 False 时数据直接来自内存映射的WAV，只需逐块换算成 float32，不需要解码、重采样和声道平均"""
+        return not (self._backend == 'wav' and self.sr == self.native_sr
+                    and (self.channels == 1 or not self.mono))
+
+    def _open_decoder(self):
+        try:
+            import soundfile
+            info = soundfile.info(self.path)
+            self._backend = 'soundfile'
+            self.native_sr = info.samplerate
+            self.channels = info.channels
+            self.native_frames = info.frames
+            return
+        except Exception:
+            pass
+        import audioread
+        with audioread.audio_open(self.path) as f:
+            self.native_sr = f.samplerate
+            self.channels = f.channels
+            self.native_frames = int(round(f.duration * f.samplerate)) if f.duration else None
+        self._backend = 'audioread'
+
+    def _raw_blocks(self):
+        """按原采样率给出 (帧数, 声道数) 或一维的数据块"""
+        if self._backend == 'wav':
+            data = self._wav
+            for start in range(0, len(data), self.block):
+                yield data[start:start + self.block]
+        elif self._backend == 'soundfile':
+            import soundfile
+            for blk in soundfile.blocks(self.path, blocksize=self.block, dtype='float32', always_2d=True):
+                yield blk
+        else:
+            import audioread
+            with audioread.audio_open(self.path) as f:
+                for buf in f:
+                    pcm = np.frombuffer(buf, dtype=np.int16)
+                    yield pcm.reshape(-1, self.channels) if self.channels > 1 else pcm
+
+    def _convert(self, blk):
+        """单块换算成 float32 并做声道平均"""
+        return to_float32(blk, self.mono)
+
+    def blocks(self):
+        """
+        逐块给出转换后的数据(输出采样率下，float32)
+        """
+        resampler = StreamResampler(self.native_sr, self.sr) if self.sr != self.native_sr else None
+        for blk in self._raw_blocks():
+            x = self._convert(blk)
+            if resampler is None:
+                yield x
+            else:
+                y = resampler.process(x)
+                if len(y):
+                    yield y
+        if resampler is not None:
+            y = resampler.flush()
+            if len(y):
+                yield y
+
+    def read_all(self):
+        """读取整个文件(用于短文件或对比)"""
+        parts = list(self.blocks())
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def frame_blocks(self, frame_size=4096, hop_size=2048, max_frames=64):
+        """按 MP3Thread 的方式分帧，见模块函数 frame_blocks"""
+        return frame_blocks(self.blocks(), frame_size, hop_size, max_frames)
+
+
+def frame_blocks(blocks, frame_size=4096, hop_size=2048, max_frames=64):
+    """
+    把连续的一维数据块按 MP3Thread 的方式分帧(第i帧从 i*hop 开始，末尾补零)，每次给出最多 max_frames 帧
+
+    参数:
+        blocks: 数据块的可迭代对象，例如 AudioFileReader.blocks() 或只含一个完整数组的列表
+
+    返回:
+        生成器，每次给出形状为 (帧数, frame_size) 的数组(通常是不复制的视图)
+    """
+    buf = np.zeros(0, dtype=np.float32)
+    for blk in blocks:
+        buf = np.concatenate([buf, blk]) if len(buf) else blk
+        while len(buf) >= frame_size:
+            frames = frame_view(buf, frame_size, hop_size)[:max_frames]
+            yield frames
+            buf = buf[len(frames) * hop_size:]
+    # 末尾: 起点还在数据范围内的帧补零
+    n_tail = -(-len(buf) // hop_size)
+    if n_tail:
+        padded = np.zeros((n_tail - 1) * hop_size + frame_size, dtype=np.float32)
+        padded[:len(buf)] = buf
+        yield frame_view(padded, frame_size, hop_size)
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+    import time
+    import tracemalloc
+
+    from scipy.io import wavfile
+
+    # 分块重采样与整体重采样一致
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(100003).astype(np.float32)
+    rs = StreamResampler(48000, 44100)
+    parts = [rs.process(x[i:i + 7777]) for i in range(0, len(x), 7777)] + [rs.flush()]
+    ref = scipy.signal.resample_poly(x, 147, 160)
+    y = np.concatenate(parts)
+    print(f"Block resampling: {len(y)} samples (reference {len(ref)}), max difference {np.max(np.abs(y - ref)):.2e}")
+
+    # 长的立体声 48kHz WAV: 首帧时间和峰值内存
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        minutes = 10
+        t = np.arange(48000 * 60 * minutes) / 48000
+        pcm = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+        del t
+        wavfile.write(path, 48000, np.column_stack([pcm, pcm]))
+        del pcm
+    size = os.path.getsize(path)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    reader = AudioFileReader(path, sr=44100)
+    frames_iter = reader.frame_blocks(4096, 2048)
+    first = next(frames_iter)
+    t_first = time.perf_counter() - start
+    n_frames = len(first)
+    for frames in frames_iter:
+        n_frames += len(frames)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{size / 1e6:.0f} MB WAV ({reader.duration:.0f} s, {reader.native_sr} Hz, {reader.channels} ch): "
+          f"first frame after {t_first * 1e3:.1f} ms, {n_frames} frames in {elapsed:.2f} s, "
+          f"peak traced memory {peak / 1e6:.1f} MB")
+    if len(sys.argv) <= 1:
+        os.remove(path)
@@ -0,0 +1,254 @@
+"""
+批量频谱分析(无界面)
+
+对一个目录中的 WAV/FLAC/MP3 文件计算加窗频谱、平均功率谱密度和峰值表，
+用 multiprocessing 进程池并行处理，结果保存为压缩的 NPZ 和/或 CSV。
+每个文件逐块解码、分帧和变换，只累加每条谱线的功率，每个进程的内存占用与音频长度无关；
+只有指定 --waterfall 时才保存逐帧幅值谱。
+已经处理过的文件(输出比音频文件新)会被跳过，中断后重新运行即可继续。
+
+频谱定标与两个频谱程序一致: A = |X|/(N/2)，直流分量再除以2，按窗的相干增益修正；
+dB谱为 20*log10(A+1e-10)。平均幅值谱为各帧功率平均后开方(与频谱平均器的线性平均相同)，
+功率谱密度的定标与 SpectrumEngine.psd 相同。
+
+用法:
+    python batch_spectrum.py 音频目录 [-o 输出目录] [-N 4096] [--window hanning] [--format both]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import scipy.signal
+
+from audio_reader import AudioFileReader, frame_blocks
+from peak_estimator import find_peaks, interpolate_peaks
+from spectrogram import Spectrogram
+from window_functions import WINDOW_NAMES, get_window, window_gains
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.mp3')
+
+DB_FLOOR = 1e-10
+
+
+def output_stem(path, in_dir, out_dir):
+    """输出文件名(不含扩展名)，保留输入目录下的相对路径，避免重名"""
+    rel = os.path.splitext(os.path.relpath(path, in_dir))[0]
+    return os.path.join(out_dir, rel)
+
+
+def is_done(path, stem, formats):
+    """输出文件都存在且比音频文件新时认为已经处理过"""
+    targets = []
+    if 'npz' in formats:
+        targets.append(stem + '.npz')
+    if 'csv' in formats:
+        targets += [stem + '_spectrum.csv', stem + '_peaks.csv']
+    src_time = os.path.getmtime(path)
+    return all(os.path.exists(t) and os.path.getmtime(t) >= src_time for t in targets)
+
+
+def analyze(blocks, sr, N, hop, win_type, n_peaks, waterfall=False):
+    """
+    逐块计算一段音频的平均幅值谱、功率谱密度和峰值表；只累加每条谱线的功率，
+    内存占用与音频长度无关(waterfall=True 时才保存逐帧幅值谱)
+
+    参数:
+        blocks: 单声道 float32 数据块的可迭代对象，例如 AudioFileReader.blocks()，或只含一个完整数组的列表
+        waterfall: 是否保存逐帧幅值谱
+
+    返回:
+        结果字典
+    """
+    spec = Spectrogram(sr, N, hop, win_type=win_type, workers=1)
+    n_bins = len(spec.f)
+    # 完整帧的功率和，用于平均幅值谱和功率谱密度(与 scipy.signal.welch 相同，不含末尾补零帧)
+    power_full = np.zeros(n_bins)
+    power_first = None  # 第一帧的功率，音频短于一帧(没有完整帧)时用补零的这一帧作为平均幅值谱
+    n_frames = n_full = 0
+    n_samples = 0
+    head = []  # 开头不足一帧的数据，只在整段音频短于一帧时使用
+    W = []
+
+    def counted(blocks):
+        nonlocal n_samples
+        for blk in blocks:
+            if n_samples < N:
+                head.append(np.array(blk[:N - n_samples]))
+            n_samples += len(blk)
+            yield blk
+
+    for frames in frame_blocks(counted(blocks), N, hop, max_frames=256):
+        A = spec.amplitude_frames(frames)
+        P = np.square(A, dtype=np.float64)
+        if power_first is None:
+            power_first = P[0].copy()
+        # 已读入的数据覆盖了整帧的帧是完整帧(补零的帧只在数据读完后出现)
+        full = max(0, min(len(frames), (n_samples - N) // hop + 1 - n_frames))
+        power_full += P[:full].sum(axis=0)
+        n_full += full
+        n_frames += len(frames)
+        if waterfall:
+            W.append(A)
+
+    if n_full:
+        A = np.sqrt(power_full / n_full)
+    else:
+        A = np.sqrt(power_first) if power_first is not None else np.zeros(n_bins)
+    A_db = 20 * np.log10(A + DB_FLOOR)
+
+    if n_full:
+        # 由幅值谱的定标 A = |X|/(N/2)/相干增益(直流再除以2) 还原 |X|²，换算为单边功率谱密度
+        gains = window_gains(win_type, N)
+        factor = np.full(n_bins, 2.0)
+        factor[0] = 4.0
+        if N % 2 == 0:
+            factor[-1] = 1.0
+        f_psd = spec.f
+        psd = power_full / n_full * factor * (N / 2 * gains['coherent_gain']) ** 2 / (sr * gains['sum_sq'])
+    else:
+        # 音频短于一帧: 与原来一样用整段数据作为一段
+        y = np.concatenate(head) if head else np.zeros(0, dtype=np.float32)
+        nperseg = max(len(y), 1)
+        f_psd, psd = scipy.signal.welch(y, sr, window=get_window(win_type, nperseg), nperseg=nperseg,
+                                        noverlap=0, detrend=False, scaling='density')
+
+    df = sr / N
+    idx = find_peaks(A, n_peaks)
+    idx = idx[idx < len(A) - 1]
+    if len(idx):
+        peak_freq, peak_amp = interpolate_peaks(A, idx, df, 'window', win_type, N)
+    else:
+        peak_freq = peak_amp = np.empty(0)
+    return {
+        'f': spec.f, 'A': A, 'A_db': A_db,
+        'f_psd': f_psd, 'psd': psd,
+        'peak_bin': idx, 'peak_freq': peak_freq, 'peak_amp': peak_amp,
+        'peak_db': 20 * np.log10(peak_amp + DB_FLOOR),
+        'n_frames': n_frames, 'duration': n_samples / sr,
+        'waterfall': np.concatenate(W) if W else np.zeros((0, n_bins), dtype=np.float32),
+    }
+
+
+def save_results(stem, res, formats, params, waterfall=False):
+    """先写临时文件再改名，中断时不会留下不完整的输出(续跑时也就不会误跳过)"""
+    os.makedirs(os.path.dirname(stem) or '.', exist_ok=True)
+    if 'npz' in formats:
+        arrays = {k: v for k, v in res.items() if isinstance(v, np.ndarray) and k != 'waterfall'}
+        if waterfall:
+            arrays['waterfall'] = res['waterfall']
+        arrays.update({k: np.asarray(v) for k, v in params.items()})
+        tmp = stem + '.npz.tmp'
+        with open(tmp, 'wb') as fp:
+            np.savez_compressed(fp, **arrays)
+        os.replace(tmp, stem + '.npz')
+    if 'csv' in formats:
+        tmp = stem + '_spectrum.csv.tmp'
+        with open(tmp, 'w', newline='') as fp:
+            w = csv.writer(fp)
+            w.writerow(['freq_hz', 'amplitude', 'amplitude_db', 'psd'])
+            # welch 与频谱使用相同的段长时频率轴相同
+            psd = res['psd'] if len(res['psd']) == len(res['f']) else np.interp(res['f'], res['f_psd'], res['psd'])
+            for row in zip(res['f'], res['A'], res['A_db'], psd):
+                w.writerow([f"{row[0]:.4f}", f"{row[1]:.6e}", f"{row[2]:.3f}", f"{row[3]:.6e}"])
+        os.replace(tmp, stem + '_spectrum.csv')
+        tmp = stem + '_peaks.csv.tmp'
+        with open(tmp, 'w', newline='') as fp:
+            w = csv.writer(fp)
+            w.writerow(['rank', 'bin', 'freq_hz', 'amplitude', 'amplitude_db'])
+            for i, row in enumerate(zip(res['peak_bin'], res['peak_freq'], res['peak_amp'], res['peak_db'])):
+                w.writerow([i + 1, row[0], f"{row[1]:.4f}", f"{row[2]:.6e}", f"{row[3]:.3f}"])
+        os.replace(tmp, stem + '_peaks.csv')
+
+
+def process_file(job):
+    """进程池中的任务: 返回 (路径, 状态, 音频时长, 用时, 说明)"""
+    path, stem, opts = job
+    start = time.perf_counter()
+    try:
+        # 单声道 float32，重采样到分析采样率(WAV 内存映射读取，其他格式分块解码)
+        reader = AudioFileReader(path, sr=opts['sr'], mono=True)
+        res = analyze(reader.blocks(), opts['sr'], opts['N'], opts['hop'], opts['win_type'], opts['n_peaks'],
+                      opts['waterfall'])
+        params = {'sr': opts['sr'], 'N': opts['N'], 'hop': opts['hop'], 'win_type': opts['win_type']}
+        save_results(stem, res, opts['formats'], params, opts['waterfall'])
+        return path, 'ok', res['duration'], time.perf_counter() - start, f"{res['n_frames']} frames"
+    except Exception as e:
+        return path, 'failed', 0.0, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def find_audio_files(in_dir, recursive=True):
+    files = []
+    for root, dirs, names in os.walk(in_dir):
+        dirs.sort()
+        for name in sorted(names):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                files.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return files
+
+
+def parse_window(value):
+    if value.isdigit() and int(value) < len(WINDOW_NAMES):
+        return int(value)
+    names = [name.lower() for name in WINDOW_NAMES]
+    if value.lower() in names:
+        return names.index(value.lower())
+    raise argparse.ArgumentTypeError(f"窗函数应为 {', '.join(WINDOW_NAMES)} 或其编号")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量计算音频文件的频谱、功率谱密度和峰值表')
+    parser.add_argument('input', help='音频文件目录')
+    parser.add_argument('-o', '--output', default=None, help='输出目录(默认: 输入目录/spectra)')
+    parser.add_argument('-N', type=int, default=4096, help='每帧点数')
+    parser.add_argument('--hop', type=int, default=None, help='帧移(默认 N/2)')
+    parser.add_argument('--window', type=parse_window, default=1, help='窗函数名称或编号(默认 hanning)')
+    parser.add_argument('--sr', type=int, default=44100, help='分析采样率')
+    parser.add_argument('--peaks', type=int, default=10, help='峰值表的峰个数')
+    parser.add_argument('--format', choices=('npz', 'csv', 'both'), default='npz')
+    parser.add_argument('--waterfall', action='store_true', help='在NPZ中同时保存逐帧幅值谱')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='进程数')
+    parser.add_argument('--no-recursive', action='store_true', help='不处理子目录')
+    parser.add_argument('--force', action='store_true', help='重新处理已有结果的文件')
+    args = parser.parse_args(argv)
+
+    out_dir = args.output or os.path.join(args.input, 'spectra')
+    formats = ('npz', 'csv') if args.format == 'both' else (args.format,)
+    opts = {'sr': args.sr, 'N': args.N, 'hop': args.hop or args.N // 2, 'win_type': args.window,
+            'n_peaks': args.peaks, 'formats': formats, 'waterfall': args.waterfall}
+
+    files = [p for p in find_audio_files(args.input, not args.no_recursive)
+             if not os.path.abspath(p).startswith(os.path.abspath(out_dir) + os.sep)]
+    jobs = []
+    skipped = 0
+    for path in files:
+        stem = output_stem(path, args.input, out_dir)
+        if not args.force and is_done(path, stem, formats):
+            skipped += 1
+        else:
+            jobs.append((path, stem, opts))
+    print(f"共 {len(files)} 个音频文件, 跳过已处理 {skipped} 个, 待处理 {len(jobs)} 个, 进程数 {args.jobs}")
+
+    start = time.perf_counter()
+    total_audio = 0.0
+    failed = 0
+    with Pool(min(args.jobs, max(len(jobs), 1))) as pool:
+        for i, (path, status, duration, elapsed, note) in enumerate(
+                pool.imap_unordered(process_file, jobs), 1):
+            total_audio += duration
+            failed += status != 'ok'
+            print(f"[{i}/{len(jobs)}] {status:6s} {os.path.relpath(path, args.input)} "
+                  f"({duration:.1f}s 音频, {elapsed:.2f}s, {note})")
+    wall = time.perf_counter() - start
+    print(f"完成: {len(jobs) - failed} 个成功, {failed} 个失败, 用时 {wall:.2f}s, "
+          f"共 {total_audio:.1f}s 音频 ({total_audio / wall if wall > 0 else 0:.0f}x 实时)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,179 +9,253 @@
 import tkinter as tk
 from tkinter import filedialog
 import numpy as np
-from scipy.fft import rfft
-from scipy import signal as sp_signal
 import drvi.drviControlls as dr
 import threading
-import time
+from spectrum_engine import SpectrumEngine
+from plot_decimate import PlotDecimator
+from render_scheduler import RenderScheduler
+from audio_cache import DecodedAudioCache
+from signal_source import MicSource, FileSource, SyntheticSource, SQUARE
+from multichannel import MultiChannelEngine, CrossSpectrumAverager
+from spectrum_average import SpectrumAverager, AVG_NONE, AVG_LINEAR, AVG_EXP, AVG_PEAK, AVG_LABELS
 
 # 全局变量
 current_data = None
 current_fs = 44100
 is_running = False
 worker_thread = None
-window_type = 0  # 0=矩形窗, 1=汉宁窗, 2=汉明窗, 3=布莱克曼窗
+window_type = 0  # 0=矩形窗, 1=汉宁窗, 2=汉明窗, 3=布莱克曼窗, 4=平顶窗, 5=凯泽窗, 6=图基窗
 scale_type = 0  # 0=线性, 1=对数
-
-# ========== 窗函数应用 ==========
-def apply_window(data, win_type):
-    """应用窗函数"""
-    N = len(data)
-    if win_type == 0:  # 矩形窗
-        return data
-    elif win_type == 1:  # 汉宁窗
-        window = np.hanning(N)
-        return data * window
-    elif win_type == 2:  # 汉明窗
-        window = np.hamming(N)
-        return data * window
-    elif win_type == 3:  # 布莱克曼窗
-        window = np.blackman(N)
-        return data * window
-    return data
+avg_mode = 0  # 0=不平均, 1=线性平均, 2=指数平均, 3=峰值保持
+averager = None
+PROCESS_DTYPE = np.float64  # 频谱计算精度；np.float32 时窗函数、FFT(complex64)、幅值谱和dB谱都用单精度
+MIC_CHANNELS = 1  # 麦克风采集的声道数；多声道时显示第0声道，并计算各声道对的相干函数
+cross_averager = None
+RENDER_FPS = 30  # 显示帧率，与采集/计算速率无关
+renderer = None
+
+# 绘图前按像素抽取(绘图区900像素宽，频谱只显示0~5000Hz)
+wave_decimator = PlotDecimator(900)
+amp_decimator = PlotDecimator(900, x_range=(0, 5000))
+
+# ========== 解码音频缓存 ==========
+audio_cache = None
+
+def get_audio_cache():
+    """第一次打开音频文件时创建磁盘缓存；缓存目录不可用时返回 None(不使用缓存)"""
+    global audio_cache
+    if audio_cache is None:
+        try:
+            audio_cache = DecodedAudioCache()
+        except OSError as e:
+            print(f"音频缓存不可用: {e}")
+            return None
+    return audio_cache
+
+# ========== 频谱引擎 ==========
+spectrum_engine = None
+# 频谱引擎和平均器使用预分配的缓冲区，采集/播放线程和界面按钮的回调(主线程)都会用到，
+# 创建、替换、重置和计算都要持有这个锁
+spectrum_lock = threading.Lock()
+
+def get_spectrum_engine(N, Fs):
+    """返回与当前 (N, Fs, 窗函数) 匹配的频谱引擎，配置改变时才重新创建"""
+    global spectrum_engine
+    if spectrum_engine is None or not spectrum_engine.matches(N, Fs, window_type, dtype=PROCESS_DTYPE):
+        spectrum_engine = SpectrumEngine(N, Fs, window_type, dtype=PROCESS_DTYPE)
+    return spectrum_engine
+
+def get_averager(engine):
+    """返回与频谱引擎匹配的平均器，引擎(窗函数/点数)改变时重新开始平均"""
+    global averager
+    if averager is None or averager.engine is not engine:
+        averager = SpectrumAverager(engine, mode=avg_mode)
+    averager.set_mode(avg_mode)
+    return averager
+
+def get_cross_averager(N, Fs, channels):
+    """返回与当前 (N, Fs, 声道数, 窗函数) 匹配的多声道互谱平均器"""
+    global cross_averager
+    engine = cross_averager.engine if cross_averager is not None else None
+    if engine is None or not engine.matches(N, Fs, channels, window_type, dtype=PROCESS_DTYPE):
+        engine = MultiChannelEngine(N, Fs, channels, window_type, dtype=PROCESS_DTYPE)
+        cross_averager = CrossSpectrumAverager(engine)
+    return cross_averager
+
+def print_coherence(avg):
+    """打印每个声道对相干函数最大的频率"""
+    coh = avg.coherence()
+    f = avg.engine.f
+    for (i, j), c in zip(zip(*avg.pairs), coh):
+        k = int(np.argmax(c[1:])) + 1
+        print(f"  声道 {i}-{j}: 相干函数最大 {c[k]:.3f} @ {f[k]:.0f} Hz, 平均 {c.mean():.3f}")
 
 # ========== 频谱计算和显示 ==========
 def updateSpectrum():
-    """更新频谱显示"""
+    """更新频谱显示; 平均器中已有数据时(新数据由采集/播放线程计入)显示平均结果"""
     global current_data, current_fs, window_type, scale_type
 
     if current_data is None or len(current_data) == 0:
         return
 
     try:
-        # 应用窗函数
-        windowed_data = apply_window(current_data, window_type)
-
-        # 计算FFT
-        N = len(windowed_data)
-        spectrum = np.fft.rfft(windowed_data)
-        A = np.abs(spectrum) / (N / 2)
-        A[0] = A[0] / 2
-
-        # 频率轴
-        df = current_fs / N
-        f = np.arange(len(A)) * df
-
-        # 根据scale_type显示
-        if scale_type == 0:  # 线性谱
-            mPlotAmp.setValue2D(f, A)
-            max_val = max(A) if len(A) > 0 else 1
-            mPlotAmp.setYlim(0, max_val * 1.2)
-        else:  # 对数谱（dB）
-            A_db = 20 * np.log10(A + 1e-10)  # 避免log(0)
-            mPlotAmp.setValue2D(f, A_db)
-            max_db = max(A_db[A_db > -60]) if len(A_db[A_db > -60]) > 0 else 0
-            mPlotAmp.setYlim(-60, max_db + 10)
+        with spectrum_lock:
+            # 计算FFT(加窗、幅值修正和直流分量修正都在频谱引擎中完成)
+            N = len(current_data)
+            engine = get_spectrum_engine(N, current_fs)
+
+            # 频谱平均: 在加窗FFT之后、显示之前更新累加器
+            A = None
+            if avg_mode != AVG_NONE and averager is not None:
+                avg = get_averager(engine)
+                if avg.count > 0:
+                    A = avg.result
+            if A is None:
+                A = engine.amplitude(current_data)
+
+            # 显示(频率轴已缓存；plotSpectrum 投递副本，出锁后缓冲区可以被覆盖)
+            plotSpectrum(engine.f, A, engine.db(A) if scale_type == 1 else None)
 
     except Exception as e:
         print(f"频谱计算错误: {e}")
 
-# ========== 麦克风采集线程 ==========
-class MicThread(threading.Thread):
-    def __init__(self):
+def plotSpectrum(f, A, A_db=None):
+    """按 scale_type 准备幅值谱 A 的显示数据，交给渲染调度器在主线程绘制；对数谱时可传入已经算好的 A_db"""
+    if scale_type == 0:  # 线性谱
+        fx, y = amp_decimator.reduce(f, A)
+        max_val = A.max() if len(A) > 0 else 1
+        ylim = (0, max_val * 1.2)
+    else:  # 对数谱（dB）
+        if A_db is None:
+            A_db = 20 * np.log10(A + 1e-10)  # 避免log(0)
+        fx, y = amp_decimator.reduce(f, A_db)
+        max_db = A_db.max()
+        ylim = (-60, (max_db if max_db > -60 else 0) + 10)
+    # A/A_db 可能是引擎的缓冲区，投递副本
+    renderer.post(spectrum=(np.array(fx), np.array(y), ylim))
+
+def plotWave(data, Fs):
+    """准备时域波形的显示数据，交给渲染调度器在主线程绘制"""
+    t = np.arange(len(data)) / Fs
+    tx, y = wave_decimator.reduce(t, data)
+    renderer.post(wave=(tx, np.array(y)))
+
+def render_frame(parts):
+    """渲染调度器在主线程中调用: 只画最新的一帧"""
+    if 'wave' in parts:
+        t, y = parts['wave']
+        mPlotWave.setValue2D(t, y)
+        mPlotWave.setYlim(-1, 1)
+    if 'spectrum' in parts:
+        f, y, ylim = parts['spectrum']
+        mPlotAmp.setValue2D(f, y)
+        mPlotAmp.setYlim(*ylim)
+
+# ========== 采集/播放线程 ==========
+class SourceThread(threading.Thread):
+    """
+    从信号源(signal_source 中的 MicSource、FileSource、SyntheticSource、ReplaySource 等)读取并分析
+
+    每次显示最近 M 个采样点(一帧)，帧移为 hop: hop < M 时相邻两帧重叠，
+    只有新读入的 hop 个采样点计入频谱平均(平均器按自己的重叠率分段)。
+
+    参数:
+        source: 信号源
+        name: 打印信息中使用的名称
+        M: 每帧点数
+        hop: 帧移，默认等于 M(不重叠)
+    """
+
+    def __init__(self, source, name, M=4096, hop=None):
         threading.Thread.__init__(self)
         self.daemon = True
         self.running = True
+        self.source = source
+        self.name = name
+        self.M = M
+        self.hop = hop or M
 
     def run(self):
         global current_data, current_fs, is_running
         try:
-            import pyaudio
-
-            Fs = 44100
-            M = 4096
+            Fs = self.source.sample_rate
+            M = self.M
+            hop = self.hop
             current_fs = Fs
-
-            p = pyaudio.PyAudio()
-            stream = p.open(format=pyaudio.paInt16, channels=1, rate=Fs,
-                          input=True, frames_per_buffer=M)
-
-            print("麦克风采集已启动...")
-
-            while self.running and is_running:
-                try:
-                    data = stream.read(M, exception_on_overflow=False)
-                    samples = np.frombuffer(data, np.int16)
-                    current_data = samples / 32768.0  # 归一化
-
-                    # 显示波形
-                    t = np.arange(len(current_data)) / Fs
-                    mPlotWave.setValue2D(t, current_data)
-                    mPlotWave.setYlim(-1, 1)
-
-                    # 更新频谱
-                    updateSpectrum()
-
-                except Exception as e:
-                    print(f"采集错误: {e}")
-
-                time.sleep(0.05)
-
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
-            print("麦克风采集已停止")
+            channels = self.source.channels
+            frame = np.zeros((M, channels) if channels > 1 else M, dtype=PROCESS_DTYPE)
+            display = frame[:, 0] if channels > 1 else frame  # 显示和单声道频谱使用第0声道(视图)
+            cross = get_cross_averager(M, Fs, channels) if channels > 1 else None
+            if cross is not None:
+                cross.reset()
+
+            def read_next(first):
+                """读入下一帧(第一帧读满 M 点，之后左移并读入 hop 点)，返回新数据的起点和点数"""
+                if first:
+                    start = 0
+                else:
+                    frame[:M - hop] = frame[hop:]
+                    start = M - hop
+                n = self.source.read_into(frame[start:])
+                frame[start + n:] = 0  # 数据结束时末尾补零
+                return start, n
+
+            def accumulate(start, n):
+                """新数据计入平均"""
+                if n == 0:
+                    return
+                if cross is not None:
+                    # 全部声道一次批量变换，累加自谱和互谱
+                    cross.add(frame[start:start + n])
+                if avg_mode != AVG_NONE:
+                    with spectrum_lock:
+                        get_averager(get_spectrum_engine(M, Fs)).add(display[start:start + n])
+
+            with self.source:
+                print(f"{self.name}已启动...")
+                first = True
+                while self.running and is_running:
+                    try:
+                        start, n = read_next(first)
+                        first = False
+                        if n == 0:
+                            break
+
+                        # 处理跟不上时信号源中会积压多块: 全部计入平均，只显示最新的一帧
+                        while n == M - start and self.source.available() >= hop:
+                            accumulate(start, n)
+                            start, n = read_next(False)
+
+                        accumulate(start, n)
+                        current_data = display.copy()
+
+                        # 显示波形
+                        plotWave(current_data, Fs)
+
+                        # 更新频谱(新数据已经计入平均)
+                        updateSpectrum()
+
+                        if n < M - start:  # 数据已经结束
+                            break
+
+                    except Exception as e:
+                        print(f"{self.name}错误: {e}")
+                        self.running = False
+
+            if cross is not None and cross.count > 0:
+                print(f"{channels} 个声道, 平均 {cross.count} 段:")
+                print_coherence(cross)
+            if hasattr(self.source, 'stats'):
+                s = self.source.stats()
+                print(f"{self.name}已停止 (溢出丢失 {s['overruns']} 点, 等待超时 {s['underruns']} 次, "
+                      f"声卡溢出 {s['device_overflows']} 次)")
+            else:
+                print(f"{self.name}已停止")
 
         except Exception as e:
-            print(f"麦克风初始化错误: {e}")
-            print("请确保：1) 已安装pyaudio (pip install pyaudio)  2) 麦克风已连接")
-
-    def stop(self):
-        self.running = False
-
-# ========== MP3播放线程 ==========
-class MP3Thread(threading.Thread):
-    def __init__(self, filepath):
-        threading.Thread.__init__(self)
-        self.daemon = True
-        self.running = True
-        self.filepath = filepath
-
-    def run(self):
-        global current_data, current_fs, is_running
-        try:
-            import librosa
-
-            # 加载音频文件
-            print(f"加载音频文件: {self.filepath}")
-            y, sr = librosa.load(self.filepath, sr=44100, mono=True)
-            current_fs = sr
-
-            print(f"音频加载成功: 采样率={sr}Hz, 长度={len(y)/sr:.2f}秒")
-
-            # 播放音频（分段显示）
-            chunk_size = 4096
-            hop_size = 2048
-            total_samples = len(y)
-            pos = 0
-
-            while self.running and is_running and pos < total_samples:
-                try:
-                    # 提取当前片段
-                    end_pos = min(pos + chunk_size, total_samples)
-                    current_data = y[pos:end_pos]
-
-                    # 显示波形
-                    t = np.arange(len(current_data)) / sr
-                    mPlotWave.setValue2D(t, current_data)
-                    mPlotWave.setYlim(-1, 1)
-
-                    # 更新频谱
-                    updateSpectrum()
-
-                    # 移动到下一片段
-                    pos += hop_size
-                    time.sleep(hop_size / sr)  # 按实际时间播放
-
-                except Exception as e:
-                    print(f"播放错误: {e}")
-                    break
-
-            print("音频播放完成")
-
-        except Exception as e:
-            print(f"MP3播放错误: {e}")
-            print("请确保：1) 已安装librosa (pip install librosa)  2) 文件路径正确")
+            print(f"{self.name}错误: {e}")
+            if isinstance(self.source, MicSource):
+                print("请确保：1) 已安装pyaudio (pip install pyaudio)  2) 麦克风已连接")
 
     def stop(self):
         self.running = False
@@ -196,7 +270,30 @@ def start_mic(v=None):
         return
 
     is_running = True
-    worker_thread = MicThread()
+    reset_average()
+    try:
+        # 回调方式采集: 声卡数据写入环形缓冲区，分析线程按自己的节奏读取，处理慢也不丢采样；
+        # 环形缓冲区保存原始 int16 数据(回调中只复制)，分析线程读取时才换算成 PROCESS_DTYPE
+        source = MicSource(44100, block=1024, channels=MIC_CHANNELS, dtype=np.int16)
+    except Exception as e:
+        is_running = False
+        print(f"麦克风初始化错误: {e}")
+        return
+    worker_thread = SourceThread(source, "麦克风采集")
+    worker_thread.start()
+
+def start_test(v=None):
+    """启动测试信号(不需要声卡): 按实际时间产生的 1kHz 方波加白噪声"""
+    global is_running, worker_thread
+
+    if is_running:
+        print("已在运行中，请先停止...")
+        return
+
+    is_running = True
+    reset_average()
+    source = SyntheticSource(44100, SQUARE, freq=1000.0, amp=0.5, noise=0.01, realtime=True)
+    worker_thread = SourceThread(source, "测试信号")
     worker_thread.start()
 
 def start_mp3(v=None):
@@ -218,8 +315,22 @@ def start_mp3(v=None):
 
     mEntryFile.setValueString(filepath)
 
+    try:
+        # 流式读取并按实际时间给出数据: 边解码边显示，内存占用与文件长度无关；
+        # 同一文件(按内容)解码过时直接内存映射缓存，否则解码的同时写入缓存
+        source = FileSource(filepath, 44100, realtime=True, cache=get_audio_cache())
+    except Exception as e:
+        print(f"音频打开错误: {e}")
+        print("请确保：1) WAV以外的格式需要安装 soundfile 或 librosa (pip install librosa)  2) 文件路径正确")
+        return
+    reader = source.reader
+    duration = f"{reader.duration:.2f}秒" if reader.duration is not None else "未知"
+    print(f"音频打开成功: 原始采样率={reader.native_sr}Hz, 声道数={reader.channels}, 长度={duration}")
+
     is_running = True
-    worker_thread = MP3Thread(filepath)
+    reset_average()
+    # 帧长4096点，帧移2048点(50%重叠)
+    worker_thread = SourceThread(source, "音频播放", M=4096, hop=2048)
     worker_thread.start()
 
 def stop_all(v=None):
@@ -231,7 +342,8 @@ def stop_all(v=None):
         worker_thread.stop()
         worker_thread = None
 
-    print("已停止")
+    st = renderer.stats()
+    print(f"已停止 (显示 {st['rendered']} 帧, 丢弃过时帧 {st['dropped']}, 平均绘图 {st['avg_render_ms']:.1f} ms)")
 
 # ========== 窗函数选择 ==========
 def set_window_rect(v):
@@ -262,6 +374,27 @@ def set_window_blackman(v):
     if current_data is not None:
         updateSpectrum()
 
+def set_window_flattop(v):
+    global window_type
+    window_type = 4
+    print("窗函数: 平顶窗")
+    if current_data is not None:
+        updateSpectrum()
+
+def set_window_kaiser(v):
+    global window_type
+    window_type = 5
+    print("窗函数: 凯泽窗")
+    if current_data is not None:
+        updateSpectrum()
+
+def set_window_tukey(v):
+    global window_type
+    window_type = 6
+    print("窗函数: 图基窗")
+    if current_data is not None:
+        updateSpectrum()
+
 # ========== 显示模式选择 ==========
 def set_scale_linear(v):
     global scale_type
@@ -277,6 +410,34 @@ def set_scale_log(v):
     if current_data is not None:
         updateSpectrum()
 
+# ========== 频谱平均选择 ==========
+def reset_average():
+    global averager
+    with spectrum_lock:
+        averager = None
+
+def set_average(mode):
+    global avg_mode
+    avg_mode = mode
+    reset_average()
+    print(f"频谱平均: {AVG_LABELS[mode]}")
+    if mode == AVG_LINEAR:
+        print("线性平均累计满设定段数后保持结果，再次点击重新开始")
+    if current_data is not None:
+        updateSpectrum()
+
+def set_average_none(v):
+    set_average(AVG_NONE)
+
+def set_average_linear(v):
+    set_average(AVG_LINEAR)
+
+def set_average_exp(v):
+    set_average(AVG_EXP)
+
+def set_average_peak(v):
+    set_average(AVG_PEAK)
+
 # ========== 创建GUI界面 ==========
 win = tk.Tk()
 win.geometry('1100x720')
@@ -292,7 +453,8 @@ mPlotAmp = dr.DRPlot(win, 20, 330, 900, 300, 'Frequency Spectrum', 0, 0, 0, 5000
 # ========== 控制面板 ==========
 # 控制按钮
 dr.DRLabel(win, 930, 20, 150, 30, '#003355', '#ffffff', 'Control')
-mBtnMic = dr.DRButton(win, 930, 50, 150, 40, '#006600', '#ffffff', 'Mic Start', 1)
+mBtnMic = dr.DRButton(win, 930, 50, 73, 40, '#006600', '#ffffff', 'Mic Start', 1)
+mBtnTest = dr.DRButton(win, 1007, 50, 73, 40, '#006600', '#ffffff', 'Test', 4)
 mBtnMP3 = dr.DRButton(win, 930, 100, 150, 40, '#0066cc', '#ffffff', 'Open Audio', 2)
 mBtnStop = dr.DRButton(win, 930, 150, 150, 40, '#cc0000', '#ffffff', 'Stop', 3)
 
@@ -305,14 +467,28 @@ mBtnWinRect = dr.DRButton(win, 930, 230, 150, 30, '#0066cc', '#ffffff', 'Rect',
 mBtnWinHanning = dr.DRButton(win, 930, 265, 150, 30, '#0066cc', '#ffffff', 'Hanning', 11)
 mBtnWinHamming = dr.DRButton(win, 930, 300, 150, 30, '#0066cc', '#ffffff', 'Hamming', 12)
 mBtnWinBlackman = dr.DRButton(win, 930, 335, 150, 30, '#0066cc', '#ffffff', 'Blackman', 13)
+mBtnWinFlattop = dr.DRButton(win, 930, 370, 150, 30, '#0066cc', '#ffffff', 'Flat-top', 14)
+mBtnWinKaiser = dr.DRButton(win, 930, 405, 150, 30, '#0066cc', '#ffffff', 'Kaiser', 15)
+mBtnWinTukey = dr.DRButton(win, 930, 440, 150, 30, '#0066cc', '#ffffff', 'Tukey', 16)
 
 # 谱类型选择
-dr.DRLabel(win, 930, 375, 150, 30, '#003355', '#ffffff', 'Scale Type')
-mBtnLinear = dr.DRButton(win, 930, 405, 150, 40, '#cc6600', '#ffffff', 'Linear', 20)
-mBtnLog = dr.DRButton(win, 930, 450, 150, 40, '#cc6600', '#ffffff', 'Log(dB)', 21)
+dr.DRLabel(win, 930, 480, 150, 30, '#003355', '#ffffff', 'Scale Type')
+mBtnLinear = dr.DRButton(win, 930, 510, 150, 40, '#cc6600', '#ffffff', 'Linear', 20)
+mBtnLog = dr.DRButton(win, 930, 555, 150, 40, '#cc6600', '#ffffff', 'Log(dB)', 21)
+
+# 频谱平均选择
+dr.DRLabel(win, 930, 605, 150, 30, '#003355', '#ffffff', 'Average')
+mBtnAvgNone = dr.DRButton(win, 930, 640, 73, 30, '#669900', '#ffffff', 'None', 30)
+mBtnAvgLinear = dr.DRButton(win, 1007, 640, 73, 30, '#669900', '#ffffff', 'Welch', 31)
+mBtnAvgExp = dr.DRButton(win, 930, 675, 73, 30, '#669900', '#ffffff', 'Exp', 32)
+mBtnAvgPeak = dr.DRButton(win, 1007, 675, 73, 30, '#669900', '#ffffff', 'Peak', 33)
+
+# 渲染调度: 后台线程只投递显示数据，由主线程按固定帧率绘制
+renderer = RenderScheduler(win, render_frame, fps=RENDER_FPS)
 
 # ========== 绑定事件 ==========
 mBtnMic.addCallBackSingle(start_mic)
+mBtnTest.addCallBackSingle(start_test)
 mBtnMP3.addCallBackSingle(start_mp3)
 mBtnStop.addCallBackSingle(stop_all)
 
@@ -320,10 +496,18 @@ mBtnWinRect.addCallBackSingle(set_window_rect)
 mBtnWinHanning.addCallBackSingle(set_window_hanning)
 mBtnWinHamming.addCallBackSingle(set_window_hamming)
 mBtnWinBlackman.addCallBackSingle(set_window_blackman)
+mBtnWinFlattop.addCallBackSingle(set_window_flattop)
+mBtnWinKaiser.addCallBackSingle(set_window_kaiser)
+mBtnWinTukey.addCallBackSingle(set_window_tukey)
 
 mBtnLinear.addCallBackSingle(set_scale_linear)
 mBtnLog.addCallBackSingle(set_scale_log)
 
+mBtnAvgNone.addCallBackSingle(set_average_none)
+mBtnAvgLinear.addCallBackSingle(set_average_linear)
+mBtnAvgExp.addCallBackSingle(set_average_exp)
+mBtnAvgPeak.addCallBackSingle(set_average_peak)
+
 # 打印使用说明
 print("="*80)
 print("作业2扩展版: 麦克风/MP3音频频谱分析器")
@@ -331,15 +515,17 @@ print("="*80)
 print("功能特性：")
 print("1. 麦克风实时采集和频谱分析")
 print("2. MP3/WAV/FLAC音频文件播放和频谱分析")
-print("3. 窗函数选择（矩形窗/汉宁窗/汉明窗/布莱克曼窗）")
+print("3. 窗函数选择（矩形窗/汉宁窗/汉明窗/布莱克曼窗/平顶窗/凯泽窗/图基窗）")
 print("4. 显示模式（线性谱/对数谱dB）")
+print("5. 频谱平均（线性Welch平均/指数平均/峰值保持）")
 print("="*80)
 print("使用说明：")
 print("1. 点击'Mic Start'开始麦克风采集（需要pyaudio）")
 print("2. 点击'Open Audio'选择并播放音频文件（需要librosa）")
-print("3. 点击'Stop'停止当前采集/播放")
-print("4. 选择窗函数观察频谱变化")
-print("5. 切换显示模式（Linear/Log）")
+print("3. 点击'Test'用内部测试信号运行(不需要声卡)")
+print("4. 点击'Stop'停止当前采集/播放")
+print("5. 选择窗函数观察频谱变化")
+print("6. 切换显示模式（Linear/Log）")
 print("="*80)
 print("依赖库安装：")
 print("pip install pyaudio      # 麦克风采集")
@@ -352,6 +538,7 @@ print("- 可以播放音乐并实时观察频谱变化")
 print("="*80)
 
 # 主循环
+renderer.start()
 win.mainloop()
 
 # 确保退出时停止所有线程
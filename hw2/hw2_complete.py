@@ -8,14 +8,26 @@
 """
 import tkinter as tk
 import numpy as np
-from scipy.fft import fft, rfft
-from scipy import signal as sp_signal
 import drvi.drviDSP as dsp
 import drvi.drviControlls as dr
+from window_functions import WINDOW_LABELS
+from spectrum_engine import SpectrumEngine
+from peak_estimator import interpolate_peaks
+from goertzel import GoertzelBank
+from plot_decimate import PlotDecimator
 
 # 全局变量
-window_type = 0  # 0=矩形窗, 1=汉宁窗, 2=汉明窗, 3=布莱克曼窗
+window_type = 0  # 0=矩形窗, 1=汉宁窗, 2=汉明窗, 3=布莱克曼窗, 4=平顶窗, 5=凯泽窗, 6=图基窗
 scale_type = 0  # 0=线性, 1=对数
+zoom_mode = False  # 细化谱: 只分析信号频率附近 ±zoom_halfwidth Hz 的频带
+zoom_halfwidth = 100
+zoom_points = 801
+
+# 绘图前按像素抽取(绘图区900像素宽，频谱只显示0~5000Hz)
+wave_decimator = PlotDecimator(900)
+amp_decimator = PlotDecimator(900, x_range=(0, 5000))
+# 细化谱窗口的横轴为相对信号频率的偏移 -zoom_halfwidth~+zoom_halfwidth Hz
+zoom_decimator = PlotDecimator(900, x_range=(-zoom_halfwidth, zoom_halfwidth))
 
 # 创建主窗口
 win = tk.Tk()
@@ -30,22 +42,60 @@ mPlotWave = dr.DRPlot(win, 20, 20, 900, 300, 'Time Domain', 0, 0, 0, 0.1, -1.2,
 # 频谱显示
 mPlotAmp = dr.DRPlot(win, 20, 330, 900, 300, 'Frequency Spectrum', 0, 0, 0, 5000, 0, 1)
 
-# ========== 窗函数应用 ==========
-def apply_window(data, win_type):
-    """应用窗函数"""
-    N = len(data)
-    if win_type == 0:  # 矩形窗
-        return data
-    elif win_type == 1:  # 汉宁窗
-        window = np.hanning(N)
-        return data * window
-    elif win_type == 2:  # 汉明窗
-        window = np.hamming(N)
-        return data * window
-    elif win_type == 3:  # 布莱克曼窗
-        window = np.blackman(N)
-        return data * window
-    return data
+# ========== 频谱引擎 ==========
+spectrum_engine = None
+
+def get_spectrum_engine(N, Fs):
+    """返回与当前 (N, Fs, 窗函数) 匹配的频谱引擎，配置改变时才重新创建"""
+    global spectrum_engine
+    if spectrum_engine is None or not spectrum_engine.matches(N, Fs, window_type):
+        spectrum_engine = SpectrumEngine(N, Fs, window_type)
+    return spectrum_engine
+
+zoom_engine = None
+
+def get_zoom_engine(N, Fs, f1, f2):
+    """返回与当前 (N, Fs, 频带, 点数, 窗函数) 匹配的细化谱，配置改变时才重新创建"""
+    global zoom_engine
+    # 只有打开细化谱时才导入，不增加程序的启动时间
+    from zoom_fft import ChirpZoom
+    if zoom_engine is None or not zoom_engine.matches(N, Fs, f1, f2, zoom_points, window_type):
+        zoom_engine = ChirpZoom(N, Fs, f1, f2, M=zoom_points, win_type=window_type)
+    return zoom_engine
+
+# ========== 细化谱窗口 ==========
+zoom_win = None
+mPlotZoom = None
+
+def show_zoom_window(show):
+    """显示或隐藏细化谱窗口(第一次打开时创建)"""
+    global zoom_win, mPlotZoom
+    if zoom_win is None:
+        if not show:
+            return
+        zoom_win = tk.Toplevel(win)
+        zoom_win.geometry('940x340')
+        zoom_win.config(bg="#ddeeee")
+        zoom_win.wm_title(f'细化谱: 信号频率 ±{zoom_halfwidth}Hz')
+        zoom_win.protocol('WM_DELETE_WINDOW', lambda: toggle_zoom(None))
+        mPlotZoom = dr.DRPlot(zoom_win, 20, 20, 900, 300, 'Zoom: offset from signal freq (Hz)',
+                              0, 0, -zoom_halfwidth, zoom_halfwidth, 0, 1)
+    if show:
+        zoom_win.deiconify()
+    else:
+        zoom_win.withdraw()
+
+goertzel_bank = None
+goertzel_key = None
+
+def get_goertzel_bank(f0, N, Fs):
+    """返回跟踪 f0 前3次谐波的 Goertzel 滤波器组，(f0, N, Fs, 窗函数) 改变时才重新创建"""
+    global goertzel_bank, goertzel_key
+    key = (f0, N, Fs, window_type)
+    if goertzel_bank is None or goertzel_key != key:
+        goertzel_bank = GoertzelBank.harmonics(f0, 3, N, Fs, win_type=window_type)
+        goertzel_key = key
+    return goertzel_bank
 
 # ========== 信号和频谱更新函数 ==========
 def updateSignalAndFFT(v=None):
@@ -56,33 +106,44 @@ def updateSignalAndFFT(v=None):
     t, data = mSignal.t, mSignal.data
 
     # 显示时域波形
-    mPlotWave.setValue2D(t, data)
-
-    # 应用窗函数
-    windowed_data = apply_window(data, window_type)
+    mPlotWave.setValue2D(*wave_decimator.reduce(t, data))
 
-    # 计算FFT频谱
-    N = len(windowed_data)
+    # 计算FFT频谱(加窗、幅值修正和直流分量修正都在频谱引擎中完成)
+    N = len(data)
     dt = t[1] - t[0] if len(t) > 1 else 1/44100
     Fs = 1 / dt
-    df = Fs / N
-
-    # 使用rfft计算频谱
-    spectrum = np.fft.rfft(windowed_data)
-    A = np.abs(spectrum) / (N / 2)
-    A[0] = A[0] / 2  # 直流分量修正
+    engine = get_spectrum_engine(N, Fs)
+    A = engine.amplitude(data)
 
-    # 频率轴
-    f = np.arange(len(A)) * df
+    # 频率轴(已缓存)
+    f = engine.f
+    df = engine.df
 
     # 根据显示类型显示频谱
     if scale_type == 0:  # 线性谱
-        mPlotAmp.setValue2D(f, A)
-        mPlotAmp.setYlim(0, max(A) * 1.2 if max(A) > 0 else 1)
+        mPlotAmp.setValue2D(*amp_decimator.reduce(f, A))
+        mPlotAmp.setYlim(0, A.max() * 1.2 if A.max() > 0 else 1)
     else:  # 对数谱(dB)
-        A_db = 20 * np.log10(A + 1e-10)  # 避免log(0)
-        mPlotAmp.setValue2D(f, A_db)
-        mPlotAmp.setYlim(-60, max(A_db[A_db > -60]) + 10 if len(A_db[A_db > -60]) > 0 else 10)
+        A_db = engine.db()  # 20*log10(A+1e-10)，避免log(0)
+        mPlotAmp.setValue2D(*amp_decimator.reduce(f, A_db))
+        max_db = A_db.max()
+        mPlotAmp.setYlim(-60, max_db + 10 if max_db > -60 else 10)
+
+    # 细化谱模式: 用CZT只计算信号频率附近的频带，在细化谱窗口中按相对信号频率的偏移显示
+    if zoom_mode:
+        f1 = float(max(mSignal.F - zoom_halfwidth, 0))
+        zoom = get_zoom_engine(N, Fs, f1, f1 + 2 * zoom_halfwidth)
+        f_zoom = zoom.f
+        A_zoom = zoom.amplitude(data)
+        offset = f_zoom - mSignal.F
+        if scale_type == 0:
+            mPlotZoom.setValue2D(*zoom_decimator.reduce(offset, A_zoom))
+            mPlotZoom.setYlim(0, A_zoom.max() * 1.2 if A_zoom.max() > 0 else 1)
+        else:
+            A_zoom_db = 20 * np.log10(A_zoom + 1e-10)
+            mPlotZoom.setValue2D(*zoom_decimator.reduce(offset, A_zoom_db))
+            max_db = A_zoom_db.max()
+            mPlotZoom.setYlim(-60, max_db + 10 if max_db > -60 else 10)
 
     # 频谱验证（仅对正弦波）
     signal_type = mSignal.st
@@ -100,7 +161,21 @@ def updateSignalAndFFT(v=None):
         print(f"信号参数: 频率={freq:.1f}Hz, 幅值={amp:.2f}")
         print(f"峰值频率: {peak_freq:.1f}Hz (误差: {abs(peak_freq-freq):.1f}Hz)")
         print(f"峰值幅值: {peak_amp:.3f} (误差: {abs(peak_amp-amp):.3f})")
-        print(f"窗函数: {['矩形窗','汉宁窗','汉明窗','布莱克曼窗'][window_type]}")
+
+        # 亚谱线插值估计(频率和幅值的栅栏效应修正)
+        if peak_idx < len(A) - 1:
+            est_freq, est_amp = interpolate_peaks(A, peak_idx, df, 'window', window_type, engine.N,
+                                                 nfft=engine.nfft)
+            print(f"插值频率: {est_freq[0]:.2f}Hz (误差: {abs(est_freq[0]-freq):.2f}Hz)")
+            print(f"插值幅值: {est_amp[0]:.4f} (误差: {abs(est_amp[0]-amp):.4f})")
+        # Goertzel: 直接计算信号频率及其前几次谐波处的幅值
+        bank = get_goertzel_bank(freq, N, Fs)
+        g_amp = bank.amplitude_frames(data[np.newaxis, :N])[0]
+        print(f"Goertzel幅值(1~{len(g_amp)}次谐波): {np.array2string(g_amp, precision=4)}")
+        if zoom_mode:
+            k = np.argmax(A_zoom)
+            print(f"细化谱峰值: {f_zoom[k]:.2f}Hz, 幅值={A_zoom[k]:.4f} (频点间隔 {f_zoom[1]-f_zoom[0]:.3f}Hz)")
+        print(f"窗函数: {WINDOW_LABELS[window_type]}")
         print(f"显示模式: {['线性谱','对数谱'][scale_type]}")
 
 # ========== 窗函数选择回调 ==========
@@ -128,6 +203,24 @@ def set_window_blackman(v):
     print("窗函数: 布莱克曼窗")
     updateSignalAndFFT()
 
+def set_window_flattop(v):
+    global window_type
+    window_type = 4
+    print("窗函数: 平顶窗")
+    updateSignalAndFFT()
+
+def set_window_kaiser(v):
+    global window_type
+    window_type = 5
+    print("窗函数: 凯泽窗")
+    updateSignalAndFFT()
+
+def set_window_tukey(v):
+    global window_type
+    window_type = 6
+    print("窗函数: 图基窗")
+    updateSignalAndFFT()
+
 # ========== 显示模式选择回调 ==========
 def set_scale_linear(v):
     global scale_type
@@ -141,6 +234,14 @@ def set_scale_log(v):
     print("显示模式: 对数谱(dB)")
     updateSignalAndFFT()
 
+# ========== 细化谱模式切换 ==========
+def toggle_zoom(v):
+    global zoom_mode
+    zoom_mode = not zoom_mode
+    show_zoom_window(zoom_mode)
+    print(f"细化谱模式: {'开' if zoom_mode else '关'} (信号频率 ±{zoom_halfwidth}Hz)")
+    updateSignalAndFFT()
+
 # ========== 信号类型选择回调 ==========
 def set_signal_sine(v):
     mSignal.setSignalType(0)
@@ -177,19 +278,23 @@ mKnobAmp = dr.DRKnob(win, 930, 455, 150, 150, '#004466', '#222222', '#aaaaaa', '
 mEntryAmp = dr.DREntryD(win, 950, 615, 110, 30, '#ffffff', '#000000', 0.8)
 
 # 运行按钮
-mBtnRun = dr.DRButton(win, 930, 655, 150, 50, '#006600', '#ffff00', 'RUN', 100)
+mBtnRun = dr.DRButton(win, 930, 655, 95, 50, '#006600', '#ffff00', 'RUN', 100)
+mBtnZoom = dr.DRButton(win, 1030, 655, 50, 50, '#660066', '#ffffff', 'Zoom', 101)
 
 # 窗函数选择按钮组
 dr.DRLabel(win, 20, 650, 150, 30, '#003355', '#ffffff', 'Window Function')
-mBtnWinRect = dr.DRButton(win, 180, 650, 100, 30, '#0066cc', '#ffffff', 'Rect', 10)
-mBtnWinHanning = dr.DRButton(win, 285, 650, 100, 30, '#0066cc', '#ffffff', 'Hanning', 11)
-mBtnWinHamming = dr.DRButton(win, 390, 650, 100, 30, '#0066cc', '#ffffff', 'Hamming', 12)
-mBtnWinBlackman = dr.DRButton(win, 495, 650, 100, 30, '#0066cc', '#ffffff', 'Blackman', 13)
+mBtnWinRect = dr.DRButton(win, 180, 650, 62, 30, '#0066cc', '#ffffff', 'Rect', 10)
+mBtnWinHanning = dr.DRButton(win, 246, 650, 62, 30, '#0066cc', '#ffffff', 'Hanning', 11)
+mBtnWinHamming = dr.DRButton(win, 312, 650, 62, 30, '#0066cc', '#ffffff', 'Hamming', 12)
+mBtnWinBlackman = dr.DRButton(win, 378, 650, 62, 30, '#0066cc', '#ffffff', 'Blackman', 13)
+mBtnWinFlattop = dr.DRButton(win, 444, 650, 62, 30, '#0066cc', '#ffffff', 'Flat-top', 14)
+mBtnWinKaiser = dr.DRButton(win, 510, 650, 62, 30, '#0066cc', '#ffffff', 'Kaiser', 15)
+mBtnWinTukey = dr.DRButton(win, 576, 650, 62, 30, '#0066cc', '#ffffff', 'Tukey', 16)
 
 # 显示模式选择按钮
-dr.DRLabel(win, 610, 650, 120, 30, '#003355', '#ffffff', 'Scale Type')
-mBtnLinear = dr.DRButton(win, 740, 650, 80, 30, '#cc6600', '#ffffff', 'Linear', 20)
-mBtnLog = dr.DRButton(win, 825, 650, 80, 30, '#cc6600', '#ffffff', 'Log(dB)', 21)
+dr.DRLabel(win, 650, 650, 90, 30, '#003355', '#ffffff', 'Scale Type')
+mBtnLinear = dr.DRButton(win, 745, 650, 78, 30, '#cc6600', '#ffffff', 'Linear', 20)
+mBtnLog = dr.DRButton(win, 828, 650, 78, 30, '#cc6600', '#ffffff', 'Log(dB)', 21)
 
 # ========== 信号发生器 ==========
 mSignal = dsp.DRGenerator(0, 44100, 4096, 0.8, 100, 0)
@@ -197,6 +302,7 @@ mSignal = dsp.DRGenerator(0, 44100, 4096, 0.8, 100, 0)
 # ========== 绑定事件 ==========
 # 运行按钮
 mBtnRun.addCallBackSingle(updateSignalAndFFT)
+mBtnZoom.addCallBackSingle(toggle_zoom)
 
 # 信号类型按钮
 mBtnSine.addCallBackSingle(set_signal_sine)
@@ -215,6 +321,9 @@ mBtnWinRect.addCallBackSingle(set_window_rect)
 mBtnWinHanning.addCallBackSingle(set_window_hanning)
 mBtnWinHamming.addCallBackSingle(set_window_hamming)
 mBtnWinBlackman.addCallBackSingle(set_window_blackman)
+mBtnWinFlattop.addCallBackSingle(set_window_flattop)
+mBtnWinKaiser.addCallBackSingle(set_window_kaiser)
+mBtnWinTukey.addCallBackSingle(set_window_tukey)
 
 # 显示模式按钮
 mBtnLinear.addCallBackSingle(set_scale_linear)
@@ -227,15 +336,16 @@ print("="*80)
 print("功能特性：")
 print("1. 标准信号发生器（正弦波/方波/三角波/白噪声）")
 print("2. FFT频谱分析")
-print("3. 窗函数选择（矩形窗/汉宁窗/汉明窗/布莱克曼窗）")
+print("3. 窗函数选择（矩形窗/汉宁窗/汉明窗/布莱克曼窗/平顶窗/凯泽窗/图基窗）")
 print("4. 显示模式（线性谱/对数谱dB）")
 print("5. 频谱自动验证（对于正弦波）")
+print("6. 细化谱（Zoom按钮，CZT分析信号频率附近频带）")
 print("="*80)
 print("使用说明：")
 print("1. 选择信号类型（点击Sine/Square/Triangle/Noise按钮）")
 print("2. 调节频率（10-2000Hz）和幅值（0-1）")
 print("3. 点击'RUN'按钮显示波形和频谱")
-print("4. 选择窗函数（Rect/Hanning/Hamming/Blackman）观察频谱变化")
+print("4. 选择窗函数（Rect/Hanning/Hamming/Blackman/Flat-top/Kaiser/Tukey）观察频谱变化")
 print("5. 切换显示模式（Linear/Log）观察不同显示效果")
 print("="*80)
 print("验证提示：")
@@ -243,7 +353,7 @@ print("- 正弦波: 应在设定频率处有单一峰值")
 print("- 方波: 包含奇次谐波（3f, 5f, 7f...）")
 print("- 三角波: 包含奇次谐波，但衰减更快")
 print("- 白噪声: 频谱应该是平坦的")
-print("- 窗函数影响: 非矩形窗会展宽主瓣，但降低旁瓣")
+print("- 窗函数影响: 非矩形窗会展宽主瓣，但降低旁瓣（幅值已按相干增益修正）")
 print("="*80)
 
 # 主循环
@@ -0,0 +1,174 @@
+"""
+亚谱线精度的峰值频率/幅值估计
+
+频谱验证只取 np.argmax(A) 对应的谱线，频率误差最大可达半个谱线间隔 df=Fs/N
+(N=4096 时 df≈10.8Hz)，幅值还受栅栏效应影响。这里在已有的4096点频谱上用峰值及其两侧
+谱线做插值，得到亚谱线精度的频率和幅值，全部对多个峰向量化计算:
+    'parabolic': 对幅值做抛物线插值
+    'gaussian' : 对对数幅值做抛物线插值(对汉宁/高斯类窗更准)
+    'window'   : 按窗函数主瓣形状估计频率(矩形窗、汉宁窗用两谱线比值公式，其余窗用 gaussian 方法；
+                 补零到 nfft>N 时对任何窗都按窗函数频谱数值求解比值)，
+                 并用窗函数频谱在该偏移处的幅值校正栅栏效应。需要给出帧长N(和补零后的nfft)
+另外提供相位声码器方法: 利用相隔 hop 个采样点的两帧复数频谱的相位差进一步修正频率。
+"""
+import numpy as np
+
+from window_functions import get_window, RECT, HANNING
+
+
+def find_peaks(A, n_peaks=1, lo=1, hi=None):
+    """
+    找出幅值谱中最大的若干个局部极大值
+
+    参数:
+        A: 幅值谱
+        n_peaks: 返回的峰个数
+        lo, hi: 搜索的谱线范围 [lo, hi)，默认跳过直流分量
+
+    返回:
+        按幅值从大到小排列的谱线序号数组
+    """
+    hi = len(A) - 1 if hi is None else min(hi, len(A) - 1)
+    lo = max(lo, 1)
+    seg = A[lo:hi]
+    is_peak = (seg >= A[lo - 1:hi - 1]) & (seg > A[lo + 1:hi + 1])
+    idx = np.flatnonzero(is_peak) + lo
+    if len(idx) > n_peaks:
+        idx = idx[np.argpartition(A[idx], -n_peaks)[-n_peaks:]]
+    return idx[np.argsort(A[idx])[::-1]]
+
+
+def window_response(win_type, N, delta, param=None, nfft=None):
+    """
+    窗函数频谱在偏离主瓣中心 delta 个谱线处的归一化幅值 |W(delta)|/|W(0)|
+
+    参数:
+        N: 窗长(帧长)
+        delta: 标量或数组，单位为谱线(间隔 Fs/nfft)
+        nfft: FFT长度(补零时大于N)，默认等于N
+    """
+    nfft = N if nfft is None else nfft
+    w = get_window(win_type, N, np.float64, param)
+    delta = np.atleast_1d(np.asarray(delta, dtype=float))
+    n = np.arange(N)
+    kernel = np.exp(-2j * np.pi * delta[:, None] * n[None, :] / nfft) @ w
+    return np.abs(kernel) / w.sum()
+
+
+def interpolate_peaks(A, idx, df, method='gaussian', win_type=RECT, N=None, win_param=None, nfft=None):
+    """
+    对给定谱线处的峰值做插值
+
+    参数:
+        A: 幅值谱
+        idx: 峰值谱线序号(标量或数组)，不能是第一条或最后一条谱线
+        df: 谱线间隔 (Hz)
+        method: 'parabolic' / 'gaussian' / 'window'
+        win_type: 计算频谱时使用的窗类型，method='window' 时用于频率和幅值校正
+        N: 帧长(窗长)，method='window' 时必须给出(不能从 len(A) 推算: N 为奇数或补零时都不对)
+        nfft: FFT长度，补零时传入 SpectrumEngine.nfft，默认等于N
+
+    返回:
+        freq: 估计频率 (Hz)
+        amp: 估计幅值
+    """
+    if method == 'window' and N is None:
+        raise ValueError("method='window' 需要给出帧长N")
+    nfft = N if nfft is None else nfft
+    idx = np.atleast_1d(np.asarray(idx, dtype=int))
+    a = A[idx - 1].astype(float)
+    b = A[idx].astype(float)
+    c = A[idx + 1].astype(float)
+
+    if method == 'parabolic':
+        denom = a - 2 * b + c
+        delta = np.where(denom != 0, 0.5 * (a - c) / np.where(denom != 0, denom, 1), 0.0)
+        amp = b - 0.25 * (a - c) * delta
+    elif method in ('gaussian', 'window'):
+        tiny = np.finfo(float).tiny
+        la, lb, lc = np.log(a + tiny), np.log(b + tiny), np.log(c + tiny)
+        denom = la - 2 * lb + lc
+        delta = np.where(denom != 0, 0.5 * (la - lc) / np.where(denom != 0, denom, 1), 0.0)
+        if method == 'gaussian':
+            amp = np.exp(lb - 0.25 * (la - lc) * delta)
+        else:
+            # 取两侧较大的谱线与峰值的比值 r
+            side = np.where(c > a, 1.0, -1.0)
+            r = np.maximum(a, c) / np.where(b > 0, b, 1)
+            if nfft != N:
+                # 补零后主瓣变宽，闭式公式不再适用: 按窗函数频谱数值求出比值 r 对应的偏移
+                grid = np.linspace(0, 0.5, 201)
+                ratio = window_response(win_type, N, 1 - grid, win_param, nfft) / \
+                    window_response(win_type, N, grid, win_param, nfft)
+                delta = side * np.interp(r, ratio, grid)
+            elif win_type == RECT:
+                delta = side * r / (1 + r)
+            elif win_type == HANNING:
+                delta = side * (2 * r - 1) / (r + 1)
+            amp = b / window_response(win_type, N, delta, win_param, nfft)
+    else:
+        raise ValueError(f"未知的插值方法: {method}")
+
+    delta = np.clip(delta, -0.5, 0.5)
+    return (idx + delta) * df, amp
+
+
+def princarg(phase):
+    """把相位折叠到 [-π, π)"""
+    return (phase + np.pi) % (2 * np.pi) - np.pi
+
+
+def phase_vocoder_refine(X1, X2, idx, hop, Fs, f_coarse):
+    """
+    用相位声码器方法修正频率
+
+    参数:
+        X1, X2: 相隔 hop 个采样点的两帧复数频谱
+        idx: 峰值谱线序号(标量或数组)
+        hop: 两帧起点之间的采样点数
+        Fs: 采样频率
+        f_coarse: 粗略的频率估计(例如 interpolate_peaks 的结果)，
+                  误差须小于 Fs/(2*hop)，否则相位差无法唯一确定
+
+    返回:
+        修正后的频率 (Hz)
+    """
+    idx = np.atleast_1d(np.asarray(idx, dtype=int))
+    f_coarse = np.atleast_1d(np.asarray(f_coarse, dtype=float))
+    dphi = np.angle(X2[idx]) - np.angle(X1[idx])
+    expected = 2 * np.pi * f_coarse * hop / Fs
+    return f_coarse + princarg(dphi - expected) * Fs / (2 * np.pi * hop)
+
+
+if __name__ == '__main__':
+    from spectrum_engine import SpectrumEngine
+
+    Fs = 44100
+    N = 4096
+    rng = np.random.default_rng(1)
+    freqs = rng.uniform(200, 4000, 200)
+    amps = rng.uniform(0.2, 1.0, 200)
+
+    for win_type, name in ((0, 'Rect'), (1, 'Hanning'), (3, 'Blackman')):
+        engine = SpectrumEngine(N, Fs, win_type)
+        errs = {m: ([], []) for m in ('argmax', 'parabolic', 'gaussian', 'window', 'vocoder')}
+        t = np.arange(N + N // 4) / Fs
+        for F, A0 in zip(freqs, amps):
+            x = A0 * np.sin(2 * np.pi * F * t + 0.3)
+            A = engine.amplitude(x[:N]).copy()
+            X1 = engine.spectrum(x[:N]).copy()
+            X2 = engine.spectrum(x[N // 4:N // 4 + N]).copy()
+            k = find_peaks(A, 1)
+            errs['argmax'][0].append(abs(k[0] * engine.df - F))
+            errs['argmax'][1].append(abs(A[k[0]] - A0))
+            for m in ('parabolic', 'gaussian', 'window'):
+                f_est, a_est = interpolate_peaks(A, k, engine.df, m, win_type, engine.N, nfft=engine.nfft)
+                errs[m][0].append(abs(f_est[0] - F))
+                errs[m][1].append(abs(a_est[0] - A0))
+            f_w, a_w = interpolate_peaks(A, k, engine.df, 'window', win_type, engine.N, nfft=engine.nfft)
+            f_pv = phase_vocoder_refine(X1, X2, k, N // 4, Fs, f_w)
+            errs['vocoder'][0].append(abs(f_pv[0] - F))
+            errs['vocoder'][1].append(abs(a_w[0] - A0))
+        print(f"{name}:")
+        for m, (ef, ea) in errs.items():
+            print(f"  {m:10s} max freq error {max(ef):8.4f} Hz   max amp error {max(ea):.4f}")
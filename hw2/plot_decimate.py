@@ -0,0 +1,184 @@
+"""
+按像素抽取绘图数据
+
+每一帧 mPlotWave.setValue2D 都收到全部4096个采样点，mPlotAmp.setValue2D 收到全部2049条谱线，
+而绘图区只有900像素宽，频谱只显示 0~5000Hz。Tk 画布逐段画线的开销与点数成正比，是实时分析时的主要瓶颈。
+PlotDecimator 放在 setValue2D 之前，依次做:
+    1. 裁剪到可见的x范围(两端各多保留一个点，保证曲线画到边界)
+    2. 点数超过像素数时抽取: 'minmax' 每个像素保留最小值和最大值(不会丢掉窄峰或毛刺)，
+       'lttb' 用 Largest-Triangle-Three-Buckets 算法保留形状，点数与像素数相同
+    3. 可选地把频谱按对数频率分箱(每箱取最大值，保留峰值)
+点数本来就少于像素数时原样返回(裁剪后的视图，不复制数据)。
+"""
+import numpy as np
+
+
+def crop(x, y, x_min=None, x_max=None):
+    """
+    把单调递增的 x 及对应的 y 裁剪到 [x_min, x_max]，两端各多保留一个点
+
+    返回:
+        (x, y) 的切片视图
+    """
+    i0 = 0 if x_min is None else max(np.searchsorted(x, x_min, 'left') - 1, 0)
+    i1 = len(x) if x_max is None else min(np.searchsorted(x, x_max, 'right') + 1, len(x))
+    return x[i0:i1], y[i0:i1]
+
+
+def minmax_decimate(x, y, n_pixels):
+    """
+    每个像素保留最小值和最大值，按原来的先后顺序排列
+
+    返回:
+        最多 2*n_pixels 个点的 (x, y)
+    """
+    n = len(y)
+    if n <= 2 * n_pixels:
+        return x, y
+    b = -(-n // n_pixels)  # 每个像素的点数
+    n_buckets = -(-n // b)
+    pad = n_buckets * b - n
+    yb = np.pad(y, (0, pad), mode='edge').reshape(n_buckets, b)
+    rows = np.arange(n_buckets)
+    imin = yb.argmin(axis=1)
+    imax = yb.argmax(axis=1)
+    first = np.minimum(imin, imax) + rows * b
+    second = np.maximum(imin, imax) + rows * b
+    idx = np.empty(2 * n_buckets, dtype=np.intp)
+    idx[0::2] = first
+    idx[1::2] = second
+    np.minimum(idx, n - 1, out=idx)
+    return x[idx], y[idx]
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 抽取
+
+    首末点保留，中间分成 n_out-2 个桶，每个桶选出与前一个选中点和下一个桶均值
+    构成三角形面积最大的点。每个桶依赖前一个桶的选择，只能逐桶循环(900点约几毫秒)，
+    实时显示默认用 minmax_decimate。
+
+    返回:
+        n_out 个点的 (x, y)
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    xf = np.asarray(x, dtype=float)
+    yf = np.asarray(y, dtype=float)
+    # 每个桶的均值(下一个桶的代表点)，最后一个桶之后用末点
+    sums_x = np.add.reduceat(xf[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(yf[:n - 1], edges[:-1])
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, xf[-1])
+    avg_y = np.append(sums_y / counts, yf[-1])
+
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx = xf[lo:hi]
+        by = yf[lo:hi]
+        area = np.abs((xf[a] - avg_x[i + 1]) * (by - yf[a]) - (xf[a] - bx) * (avg_y[i + 1] - yf[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def log_bin(f, A, n_bins, f_min=20.0, f_max=None):
+    """
+    把频谱按对数频率分箱，每箱取最大值
+
+    参数:
+        f: 频率轴(单调递增)
+        A: 幅值谱或dB谱
+        n_bins: 箱数
+        f_min, f_max: 频率范围，f_max 默认为 f 的最大值
+
+    返回:
+        (各箱的几何中心频率, 各箱最大值)，不含空箱
+    """
+    f_max = f[-1] if f_max is None else f_max
+    edges = np.geomspace(max(f_min, f[1] if f[0] == 0 else f[0]), f_max, n_bins + 1)
+    bounds = np.searchsorted(f, edges)
+    lo, hi = bounds[:-1], bounds[1:]
+    keep = hi > lo
+    if not keep.any():
+        return f[:0], A[:0]
+    # 空箱不含任何点，去掉后相邻非空箱仍首尾相接，只有最后一箱需要截断到 hi
+    lo, hi = lo[keep], hi[keep]
+    peak = np.maximum.reduceat(A[:hi[-1]], lo)
+    centers = np.sqrt(edges[:-1] * edges[1:])[keep]
+    return centers, peak
+
+
+class PlotDecimator:
+    """
+    绘图数据抽取器
+
+    参数:
+        width: 绘图区宽度(像素)
+        x_range: 可见的x范围 (x_min, x_max)，None 表示不裁剪
+        method: 'minmax' 或 'lttb'
+        log_bins: 对数频率分箱的箱数，None 表示不分箱
+    """
+
+    def __init__(self, width=900, x_range=None, method='minmax', log_bins=None):
+        if method not in ('minmax', 'lttb'):
+            raise ValueError(f"未知的抽取方法: {method}")
+        self.width = width
+        self.x_range = x_range
+        self.method = method
+        self.log_bins = log_bins
+
+    def reduce(self, x, y, x_range=None):
+        """
+        返回可以直接交给 setValue2D 的 (x, y)
+
+        参数:
+            x_range: 本次使用的可见范围，默认使用构造时的 x_range
+        """
+        x_range = self.x_range if x_range is None else x_range
+        if x_range is not None:
+            x, y = crop(x, y, *x_range)
+        if self.log_bins:
+            f_max = x_range[1] if x_range is not None else None
+            return log_bin(x, y, self.log_bins, f_max=f_max or x[-1])
+        if self.method == 'lttb':
+            return lttb(x, y, self.width)
+        return minmax_decimate(x, y, self.width)
+
+
+if __name__ == '__main__':
+    import time
+
+    Fs = 44100
+    N = 4096
+    rng = np.random.default_rng(0)
+    t = np.arange(N) / Fs
+    data = 0.8 * np.sin(2 * np.pi * 1000 * t) + 0.05 * rng.standard_normal(N)
+    data[1234] = 1.0  # 单点毛刺
+    A = np.abs(np.fft.rfft(data * np.hanning(N))) / (N / 2)
+    f = np.arange(len(A)) * (Fs / N)
+
+    wave = PlotDecimator(900)
+    amp = PlotDecimator(900, x_range=(0, 5000))
+    tw, dw = wave.reduce(t, data)
+    fa, aa = amp.reduce(f, A)
+    print(f"Waveform: {len(data)} -> {len(dw)} points, spike kept: {dw.max() == data.max()}")
+    print(f"Spectrum: {len(A)} -> {len(aa)} points, peak kept: {aa.max() == A.max()}")
+    tl, dl = PlotDecimator(900, method='lttb').reduce(t, data)
+    print(f"LTTB: {len(data)} -> {len(dl)} points")
+    fl, al = PlotDecimator(200, log_bins=200).reduce(f, A)
+    print(f"Log bins: {len(al)} non-empty bins from {fl[0]:.1f} to {fl[-1]:.0f} Hz, peak kept: {al.max() == A.max()}")
+
+    # 抽取本身的开销
+    for name, dec in (('minmax', wave), ('lttb', PlotDecimator(900, method='lttb'))):
+        start = time.perf_counter()
+        for _ in range(200):
+            dec.reduce(t, data)
+        print(f"{name}: {(time.perf_counter() - start) / 200 * 1e6:.0f} us per frame")
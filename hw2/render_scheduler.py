@@ -0,0 +1,134 @@
+"""
+主线程渲染调度
+
+MicThread 和 MP3Thread 原来在后台线程里直接调用 mPlotWave.setValue2D 和 mPlotAmp.setValue2D。
+Tk 不是线程安全的，而且每算出一帧就画一帧，处理得越快界面越卡。
+RenderScheduler 在 Tk 主循环中用 win.after 按固定帧率运行: 后台线程只把算好的显示数据
+投递到单槽邮箱(新数据覆盖还没画的旧数据)，主线程每个周期取出最新的一帧画出。
+处理速率和显示速率互不影响，多余的帧被丢弃并计数。
+
+邮箱按部件合并: 一帧可以同时包含 'wave' 和 'spectrum' 等部件，同一部件的新数据覆盖旧数据，
+不同部件互不覆盖。投递的数据应当是不会再被修改的副本。
+"""
+import threading
+import time
+
+
+class Mailbox:
+    """单槽邮箱: 保存每个部件最新的一份数据"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parts = {}
+        self.posted = 0
+        self.dropped = 0
+
+    def post(self, **parts):
+        with self._lock:
+            for name, value in parts.items():
+                if name in self._parts:
+                    self.dropped += 1
+                self._parts[name] = value
+            self.posted += len(parts)
+
+    def take(self):
+        """取出当前的全部部件，没有新数据时返回 None"""
+        with self._lock:
+            if not self._parts:
+                return None
+            parts, self._parts = self._parts, {}
+            return parts
+
+
+class RenderScheduler:
+    """
+    渲染调度器
+
+    参数:
+        win: Tk 窗口(或任何提供 after/after_cancel 的部件)
+        render: 在主线程中调用的绘制函数，参数为部件字典
+        fps: 显示帧率
+    """
+
+    def __init__(self, win, render, fps=30):
+        self.win = win
+        self.render = render
+        self.fps = fps
+        self.mailbox = Mailbox()
+        self.rendered = 0
+        self.render_time = 0.0
+        self._job = None
+
+    def post(self, **parts):
+        """投递显示数据(可以在任何线程中调用)"""
+        self.mailbox.post(**parts)
+
+    def set_fps(self, fps):
+        self.fps = max(1, fps)
+
+    def start(self):
+        if self._job is None:
+            self._job = self.win.after(0, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.win.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        start = time.perf_counter()
+        parts = self.mailbox.take()
+        if parts is not None:
+            try:
+                self.render(parts)
+                self.rendered += 1
+            except Exception as e:
+                print(f"绘图错误: {e}")
+        elapsed = time.perf_counter() - start
+        self.render_time += elapsed
+        # 下一次在一个周期后运行，绘图本身用掉的时间从等待中扣除
+        delay = max(1, int((1.0 / self.fps - elapsed) * 1000))
+        self._job = self.win.after(delay, self._tick)
+
+    def stats(self):
+        return {'posted': self.mailbox.posted, 'dropped': self.mailbox.dropped,
+                'rendered': self.rendered,
+                'avg_render_ms': self.render_time / self.rendered * 1000 if self.rendered else 0.0}
+
+
+if __name__ == '__main__':
+    import tkinter as tk
+
+    import numpy as np
+
+    # 后台线程以约500帧/秒产生数据，主线程按30fps画出
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=600, height=200)
+    canvas.pack()
+
+    def draw(parts):
+        y = parts['wave']
+        canvas.delete('all')
+        canvas.create_line(*np.column_stack([np.linspace(0, 600, len(y)), 100 - 90 * y]).ravel())
+
+    sched = RenderScheduler(root, draw, fps=30)
+    running = True
+
+    def produce():
+        phase = 0.0
+        x = np.linspace(0, 4 * np.pi, 600)
+        while running:
+            sched.post(wave=np.sin(x + phase))
+            phase += 0.05
+            time.sleep(0.002)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    sched.start()
+    root.after(3000, root.quit)
+    root.mainloop()
+    running = False
+    sched.stop()
+    s = sched.stats()
+    print(f"posted {s['posted']}, rendered {s['rendered']} (~{s['rendered'] / 3:.0f} fps), dropped {s['dropped']}, "
+          f"avg draw {s['avg_render_ms']:.2f} ms")
@@ -0,0 +1,334 @@
+"""
+统一的信号源接口
+
+原来的数据来源写死在各处: MicThread 直接打开 PyAudio，MP3Thread 直接调用 librosa，
+hw2_complete.py 使用 dsp.DRGenerator。这里定义一个共同的接口:
+    sample_rate:       采样率
+    channels:          声道数
+    read_into(buffer): 把接下来的数据写入 buffer(单声道为一维，多声道为 (帧数, 声道数))，
+                       返回写入的帧数；返回值小于 len(buffer) 表示数据已经结束
+    available():       不用等待就可以读取的积压帧数(麦克风处理跟不上时大于0，其他信号源为0)
+    start() / stop():  开始和结束(也可以用 with 语句)
+实现:
+    MicSource:       麦克风(回调方式采集到环形缓冲区)
+    FileSource:      音频文件(流式解码，可选解码缓存)
+    SyntheticSource: 正弦/方波/三角波/白噪声发生器(与 DRGenerator 的信号类型编号相同)
+    ReplaySource:    回放保存下来的 .npy / WAV 数据
+FileSource、SyntheticSource 和 ReplaySource 都可以按实际时间(realtime=True)或尽快(False)给出数据，
+没有声卡时也可以全速测试和评测整个分析流程。
+"""
+import os
+import time
+
+import numpy as np
+
+SINE, SQUARE, TRIANGLE, NOISE = range(4)
+
+
+class SignalSource:
+    """信号源基类"""
+
+    sample_rate = 44100
+    channels = 1
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def read_into(self, buffer):
+        raise NotImplementedError
+
+    def available(self):
+        return 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Pacer:
+    """realtime=True 时让数据的给出速度不超过实际时间"""
+
+    def __init__(self, sample_rate, realtime):
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self._t0 = None
+        self._frames = 0
+
+    def wait(self, n):
+        if not self.realtime:
+            return
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        self._frames += n
+        delay = self._t0 + self._frames / self.sample_rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class MicSource(SignalSource):
+    """
+    麦克风信号源
+
+    参数:
+        sample_rate: 采样率
+        block: 声卡回调的块大小
+        seconds: 环形缓冲区能容纳的秒数
+        device: 输入设备编号
+        channels: 声道数，多声道时 read_into 的 buffer 形状为 (帧数, 声道数)
+        dtype: 环形缓冲区的数据类型，np.int16 时保存声卡的原始数据
+    """
+
+    def __init__(self, sample_rate=44100, block=1024, seconds=10.0, device=None, channels=1,
+                 dtype=np.float32):
+        from audio_capture import MicCapture
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capture = MicCapture(sample_rate, block, seconds, device, dtype, channels)
+        self._running = False
+
+    def start(self):
+        self.capture.start()
+        self._running = True
+        return self
+
+    def stop(self):
+        self._running = False
+        self.capture.stop()
+
+    def read_into(self, buffer):
+        """等待直到缓冲区中有足够的数据；停止后返回0"""
+        while self._running:
+            if self.capture.ring.read_wait(buffer, timeout=0.5):
+                return len(buffer)
+        return 0
+
+    def available(self):
+        return self.capture.ring.available
+
+    def stats(self):
+        return self.capture.stats()
+
+
+class _BlockSource(SignalSource):
+    """把数据块的生成器转换成 read_into 接口"""
+
+    def __init__(self, sample_rate, channels, realtime):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._pacer = _Pacer(sample_rate, realtime)
+        self._blocks = None
+        self._rest = None
+
+    def _open_blocks(self):
+        raise NotImplementedError
+
+    def start(self):
+        self._blocks = self._open_blocks()
+        self._rest = None
+        return self
+
+    def stop(self):
+        if self._blocks is not None and hasattr(self._blocks, 'close'):
+            self._blocks.close()
+        self._blocks = None
+
+    def read_into(self, buffer):
+        if self._blocks is None:
+            self.start()
+        n = 0
+        while n < len(buffer):
+            if self._rest is None or len(self._rest) == 0:
+                self._rest = next(self._blocks, None)
+                if self._rest is None:
+                    break
+            take = min(len(buffer) - n, len(self._rest))
+            buffer[n:n + take] = self._rest[:take]
+            self._rest = self._rest[take:]
+            n += take
+        self._pacer.wait(n)
+        return n
+
+
+class FileSource(_BlockSource):
+    """
+    音频文件信号源(流式解码)
+
+    参数:
+        path: 音频文件
+        sample_rate: 输出采样率
+        mono: 是否转换为单声道
+        realtime: 是否按实际时间给出数据
+        cache: 可选的 DecodedAudioCache，解码过的文件直接内存映射
+    """
+
+    def __init__(self, path, sample_rate=44100, mono=True, realtime=False, cache=None):
+        from audio_reader import AudioFileReader
+        self.path = path
+        self.mono = mono
+        self.cache = cache
+        self.reader = AudioFileReader(path, sr=sample_rate, mono=mono)
+        super().__init__(self.reader.sr, 1 if mono else self.reader.channels, realtime)
+
+    def _open_blocks(self):
+        if self.cache is not None:
+            cached = self.cache.lookup(self.path, self.sample_rate, self.mono)
+            if cached is not None:
+                return iter([cached])
+            if self.reader.needs_decode:
+                return self.cache.record(self.path, self.sample_rate, self.mono, self.reader.blocks())
+        return self.reader.blocks()
+
+
+class ReplaySource(_BlockSource):
+    """
+    回放保存的数据(.npy 或 WAV)
+
+    参数:
+        data_or_path: 数组，或 .npy / .wav 文件路径(都用内存映射打开)
+        sample_rate: 数组或 .npy 文件的采样率(WAV 使用文件中的采样率)
+        realtime: 是否按实际时间给出数据
+        loop: 到末尾后是否从头重放
+        block: 每次从数据中取出的帧数
+    """
+
+    def __init__(self, data_or_path, sample_rate=44100, realtime=False, loop=False, block=65536):
+        if isinstance(data_or_path, str):
+            if data_or_path.lower().endswith('.wav'):
+                from scipy.io import wavfile
+                sample_rate, data = wavfile.read(data_or_path, mmap=True)
+            else:
+                data = np.load(data_or_path, mmap_mode='r')
+        else:
+            data = np.asarray(data_or_path)
+        from audio_reader import to_float32
+        self._to_float32 = to_float32
+        self.data = data
+        self.loop = loop
+        self.block = block
+        super().__init__(sample_rate, 1 if data.ndim == 1 else data.shape[1], realtime)
+
+    def _open_blocks(self):
+        to_float32 = self._to_float32
+        while True:
+            for i in range(0, len(self.data), self.block):
+                # 整数数据(包括无符号的8位WAV)与 AudioFileReader 一样换算成 ±1 范围的 float32
+                yield to_float32(self.data[i:i + self.block])
+            if not self.loop or len(self.data) == 0:
+                return
+
+
+class SyntheticSource(SignalSource):
+    """
+    信号发生器(本包中唯一的测试信号发生器，SyntheticCapture 和 spectrum_regression 都使用它)
+
+    参数:
+        sample_rate: 采样率
+        wave: 信号类型 0=正弦, 1=方波, 2=三角波, 3=白噪声(与 DRGenerator 相同)
+        freq, amp, phase: 频率(Hz)、幅值、初相位(度)
+        noise: 叠加白噪声的标准差
+        realtime: 是否按实际时间给出数据
+        channels: 声道数，各声道数据相同
+        seed: 随机数种子(也可以直接传入 np.random.Generator)
+    """
+
+    def __init__(self, sample_rate=44100, wave=SINE, freq=1000.0, amp=0.5, phase=0.0, noise=0.0,
+                 realtime=False, channels=1, seed=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.wave = wave
+        self.freq = freq
+        self.amp = amp
+        self.noise = noise
+        self._phase = np.deg2rad(phase)
+        self._rng = np.random.default_rng(seed)
+        self._pacer = _Pacer(sample_rate, realtime)
+        self._alloc(0)
+
+    def _alloc(self, n):
+        """工作缓冲区只在块长度增大时重新分配"""
+        self._n = np.arange(n, dtype=float)
+        self._ph = np.empty(n)
+        self._x = np.empty(n)
+        self._mask = np.empty(n, dtype=bool)
+
+    def read_into(self, buffer):
+        n = len(buffer)
+        if len(self._n) < n:
+            self._alloc(n)
+        ph, x = self._ph[:n], self._x[:n]
+        w = 2 * np.pi * self.freq / self.sample_rate
+        np.multiply(self._n[:n], w, out=ph)
+        ph += self._phase
+        if self.wave == NOISE:
+            self._rng.standard_normal(out=x)
+        else:
+            np.sin(ph, out=x)
+            if self.wave == SQUARE:
+                mask = self._mask[:n]
+                np.greater_equal(x, 0, out=mask)
+                np.multiply(mask, 2.0, out=x)
+                x -= 1
+            elif self.wave == TRIANGLE:
+                np.arcsin(x, out=x)
+                x *= 2 / np.pi
+        x *= self.amp
+        if self.noise:
+            noise = self._rng.standard_normal(out=ph)
+            noise *= self.noise
+            x += noise
+        self._phase = (self._phase + w * n) % (2 * np.pi)
+        if buffer.ndim > 1:
+            buffer[...] = x[:, None]
+        else:
+            buffer[...] = x
+        self._pacer.wait(n)
+        return n
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    from spectrum_average import SpectrumAverager, AVG_EXP
+    from spectrum_engine import SpectrumEngine
+
+    def run_pipeline(source, N=4096, max_blocks=None):
+        """与 MicThread 相同的处理: 每块做平均频谱，返回 (块数, 用时, 平均谱)"""
+        engine = SpectrumEngine(N, source.sample_rate, win_type=1)
+        avg = SpectrumAverager(engine, mode=AVG_EXP)
+        block = np.empty(N, dtype=np.float32)
+        count = 0
+        start = time.perf_counter()
+        with source:
+            while max_blocks is None or count < max_blocks:
+                n = source.read_into(block)
+                if n == 0:
+                    break
+                block[n:] = 0
+                avg.add(block)
+                count += 1
+        return count, time.perf_counter() - start, avg.result
+
+    Fs = 44100
+    synth = SyntheticSource(Fs, SQUARE, freq=440, amp=0.8, noise=0.01, seed=0)
+    count, elapsed, A = run_pipeline(synth, max_blocks=2000)
+    audio_s = count * 4096 / Fs
+    print(f"Synthetic square wave: {count} blocks ({audio_s:.0f} s of audio) in {elapsed:.2f} s "
+          f"({audio_s / elapsed:.0f}x real time)")
+
+    # 保存一段数据后按最大速度和按实际时间回放
+    fd, path = tempfile.mkstemp(suffix='.npy')
+    os.close(fd)
+    buf = np.empty(Fs * 30, dtype=np.float32)
+    SyntheticSource(Fs, SINE, freq=1000, amp=0.5, noise=0.01, seed=1).read_into(buf)
+    np.save(path, buf)
+    count, elapsed, A = run_pipeline(ReplaySource(path, Fs))
+    print(f"Replay .npy at max speed: {count} blocks in {elapsed:.3f} s, peak {A.max():.3f} at "
+          f"{np.argmax(A) * Fs / 4096:.0f} Hz")
+    count, elapsed, _ = run_pipeline(ReplaySource(path, Fs, realtime=True), max_blocks=20)
+    print(f"Replay .npy in real time: {count} blocks in {elapsed:.2f} s (expected {count * 4096 / Fs:.2f} s)")
+    os.remove(path)
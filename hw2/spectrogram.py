@@ -0,0 +1,145 @@
+"""
+批量分帧的短时傅里叶变换(STFT)/声谱图引擎
+
+MP3Thread 按 chunk_size=4096、hop_size=2048 逐段截取音频，每一段单独做一次 rfft，
+而且循环按实际播放时间 sleep，离线分析一首10分钟的曲子也要10分钟。
+这里用 sliding_window_view 得到不复制数据的分帧视图，每次取有限个帧(一个块)做批量 rfft，
+结果写入一个 (帧数 × 频点数) 的瀑布图数组，播放时只需按帧号取出对应的一行。
+
+分帧方式与 MP3Thread 相同: 第i帧从 i*hop_size 开始，直到起点超过音频末尾；
+末尾不足一帧的部分补零。幅值定标与频谱引擎一致(A=|X|/(N/2)，直流除以2，按窗的相干增益修正)。
+"""
+import os
+
+import numpy as np
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+
+from window_functions import get_window, window_gains, RECT
+
+
+def frame_view(y, frame_size, hop_size):
+    """
+    返回不复制数据的分帧视图
+
+    返回:
+        形状为 (完整帧数, frame_size) 的只读视图，只包含完全落在 y 内的帧
+    """
+    if len(y) < frame_size:
+        return np.empty((0, frame_size), dtype=y.dtype)
+    return sliding_window_view(y, frame_size)[::hop_size]
+
+
+class Spectrogram:
+    """
+    声谱图引擎
+
+    参数:
+        Fs: 采样频率
+        frame_size: 每帧点数
+        hop_size: 帧移
+        win_type: 窗类型编号(见 window_functions)
+        block_frames: 每次批量变换的帧数，限制临时内存
+        dtype: 瀑布图的数据类型
+        workers: scipy.fft 使用的线程数
+    """
+
+    def __init__(self, Fs, frame_size=4096, hop_size=2048, win_type=RECT, block_frames=256,
+                 dtype=np.float32, workers=None):
+        self.Fs = Fs
+        self.frame_size = frame_size
+        self.hop_size = hop_size
+        self.win_type = win_type
+        self.block_frames = block_frames
+        self.dtype = dtype
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._scale = 1.0 / (frame_size / 2) / window_gains(win_type, frame_size)['coherent_gain']
+        self.f = np.arange(frame_size // 2 + 1) * (Fs / frame_size)
+        self.waterfall = None
+
+    def n_frames(self, n_samples):
+        """与 MP3Thread 循环相同的帧数: 起点 0, hop, 2*hop, ... < n_samples"""
+        return max(0, -(-n_samples // self.hop_size))
+
+    def _transform(self, frames, out):
+        """对一块帧做加窗和批量 rfft，幅值谱写入 out"""
+        if self.win_type == RECT:
+            spec = scipy.fft.rfft(frames, axis=-1, workers=self.workers)
+        else:
+            window = get_window(self.win_type, self.frame_size, frames.dtype)
+            spec = scipy.fft.rfft(frames * window, axis=-1, workers=self.workers)
+        A = np.abs(spec)
+        A *= self._scale
+        A[:, 0] /= 2  # 直流分量修正
+        out[...] = A
+
+    def amplitude_frames(self, frames):
+        """
+        对一批已经分好的帧做批量变换
+
+        参数:
+            frames: 形状为 (帧数, frame_size) 的数组
+
+        返回:
+            形状为 (帧数, frame_size//2+1) 的幅值谱数组
+        """
+        out = np.empty((len(frames), len(self.f)), dtype=self.dtype)
+        self._transform(frames, out)
+        return out
+
+    def compute(self, y):
+        """
+        计算整段音频的瀑布图
+
+        参数:
+            y: 一维音频数据
+
+        返回:
+            形状为 (帧数, frame_size//2+1) 的幅值谱数组
+        """
+        n_total = self.n_frames(len(y))
+        out = np.empty((n_total, len(self.f)), dtype=self.dtype)
+
+        full = frame_view(y, self.frame_size, self.hop_size)
+        n_full = len(full)
+        for b0 in range(0, n_full, self.block_frames):
+            b1 = min(b0 + self.block_frames, n_full)
+            self._transform(full[b0:b1], out[b0:b1])
+
+        # 末尾不足一帧的部分补零后再变换，只涉及少量帧
+        if n_total > n_full:
+            tail = np.zeros((n_total - n_full, self.frame_size), dtype=y.dtype)
+            for i in range(n_full, n_total):
+                seg = y[i * self.hop_size:i * self.hop_size + self.frame_size]
+                tail[i - n_full, :len(seg)] = seg
+            self._transform(tail, out[n_full:])
+
+        self.waterfall = out
+        return out
+
+    def frame_time(self, i):
+        """第i帧的起始时间 (秒)"""
+        return i * self.hop_size / self.Fs
+
+
+if __name__ == '__main__':
+    import time
+
+    Fs = 44100
+    duration = 600
+    t = np.arange(duration * Fs) / Fs
+    y = (0.5 * np.sin(2 * np.pi * (440 + 100 * np.sin(2 * np.pi * 0.05 * t)) * t)).astype(np.float32)
+    del t
+
+    spec = Spectrogram(Fs, 4096, 2048, win_type=1)
+    start = time.perf_counter()
+    W = spec.compute(y)
+    elapsed = time.perf_counter() - start
+    print(f"{duration} s of audio -> waterfall {W.shape} ({W.nbytes / 1e6:.0f} MB) in {elapsed:.2f} s")
+
+    # 与逐帧计算对比
+    i = 1234
+    frame = y[i * 2048:i * 2048 + 4096] * np.hanning(4096)
+    A = np.abs(np.fft.rfft(frame)) / 2048 / window_gains(1, 4096)['coherent_gain']
+    A[0] /= 2
+    print(f"Max difference vs per-frame rfft at frame {i}: {np.max(np.abs(W[i] - A)):.2e}")
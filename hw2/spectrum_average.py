@@ -0,0 +1,145 @@
+"""
+频谱平均: Welch线性平均 / 指数平均 / 峰值保持
+
+MicThread 每读一次4096点就显示一次原始周期图，噪声起伏很大，也没有任何累积。
+SpectrumAverager 放在加窗FFT和 mPlotAmp.setValue2D 之间：输入的数据块按设定的重叠率
+切成段，每段由频谱引擎算出幅值谱，再把功率(A²)累加到一个常驻的累加器中(原地更新，不分配新数组)。
+输出的是均方根平均后的幅值谱，定标与 SpectrumEngine.amplitude 相同。
+
+平均方式:
+    0=不平均, 1=线性平均(Welch), 2=指数平均, 3=峰值保持
+线性平均是 n_avg 段的算术平均，累计满 n_avg 段后平均完成，结果保持不变(与频谱分析仪相同)，
+重新开始需要调用 reset()。要跟踪缓慢变化的信号请使用指数平均。
+"""
+import numpy as np
+
+AVG_NONE, AVG_LINEAR, AVG_EXP, AVG_PEAK = range(4)
+
+AVG_LABELS = ['不平均', '线性平均', '指数平均', '峰值保持']
+
+
+class SpectrumAverager:
+    """
+    频谱平均器
+
+    参数:
+        engine: SpectrumEngine，决定段长N、采样频率和窗函数
+        mode: 平均方式编号
+        n_avg: 线性平均的段数，累计满后停止更新
+        alpha: 指数平均中新一段的权重
+        overlap: 相邻两段的重叠比例(0~1)，Welch 平均常用 0.5
+    """
+
+    def __init__(self, engine, mode=AVG_LINEAR, n_avg=16, alpha=0.2, overlap=0.5):
+        self.engine = engine
+        self.N = engine.N
+        self.mode = mode
+        self.n_avg = n_avg
+        self.alpha = alpha
+        self.step = max(1, int(round(self.N * (1 - overlap))))
+
+        # 缓冲区与频谱引擎的精度相同(float64 或 float32)
+        n_bins = len(engine.f)
+        dtype = engine.A.dtype
+        self._power = np.zeros(n_bins, dtype=dtype)  # 累加器(功率)
+        self._seg_power = np.empty(n_bins, dtype=dtype)
+        self.result = np.zeros(n_bins, dtype=dtype)  # 均方根幅值谱
+        self._stage = np.zeros(2 * self.N, dtype=dtype)
+        self._fill = 0
+        self.count = 0
+
+    def reset(self):
+        self._power[:] = 0
+        self.result[:] = 0
+        self._fill = 0
+        self.count = 0
+
+    def set_mode(self, mode):
+        if mode != self.mode:
+            self.mode = mode
+            self.reset()
+
+    @property
+    def complete(self):
+        """线性平均是否已累计满 n_avg 段"""
+        return self.mode == AVG_LINEAR and self.count >= self.n_avg
+
+    def _accumulate(self, segment):
+        if self.complete:
+            return
+        A = self.engine.amplitude(segment)
+        P = self._seg_power
+        np.square(A, out=P)
+        acc = self._power
+        if self.count == 0 or self.mode == AVG_NONE:
+            acc[:] = P
+        elif self.mode == AVG_LINEAR:
+            # acc += (P - acc) / k
+            P -= acc
+            P *= 1.0 / (self.count + 1)
+            acc += P
+        elif self.mode == AVG_EXP:
+            acc *= 1 - self.alpha
+            P *= self.alpha
+            acc += P
+        elif self.mode == AVG_PEAK:
+            np.maximum(acc, P, out=acc)
+        self.count += 1
+
+    def add(self, block):
+        """
+        加入一块新数据，按重叠率切段并更新累加器
+
+        参数:
+            block: 一维数据，长度任意
+
+        返回:
+            当前的平均幅值谱(缓冲区，之后会被原地更新)
+        """
+        N = self.N
+        stage = self._stage
+        pos = 0
+        n = len(block)
+        while pos < n:
+            take = min(len(stage) - self._fill, n - pos)
+            stage[self._fill:self._fill + take] = block[pos:pos + take]
+            self._fill += take
+            pos += take
+            while self._fill >= N:
+                self._accumulate(stage[:N])
+                # 保留与下一段重叠的部分
+                remain = self._fill - self.step
+                stage[:remain] = stage[self.step:self._fill]
+                self._fill = remain
+        np.sqrt(self._power, out=self.result)
+        return self.result
+
+
+if __name__ == '__main__':
+    from spectrum_engine import SpectrumEngine
+
+    Fs = 44100
+    N = 4096
+    rng = np.random.default_rng(0)
+    t = np.arange(N * 40) / Fs
+    x = 0.1 * np.sin(2 * np.pi * 1000 * t) + 0.05 * rng.standard_normal(len(t))
+
+    engine = SpectrumEngine(N, Fs, win_type=1)
+    band = (engine.f > 3000) & (engine.f < 8000)
+    raw = engine.amplitude(x[:N])[band]
+    print(f"Single periodogram: noise floor std/mean = {raw.std() / raw.mean():.3f}")
+    for mode in (AVG_LINEAR, AVG_EXP, AVG_PEAK):
+        avg = SpectrumAverager(engine, mode=mode, n_avg=64, overlap=0.5)
+        for i in range(0, len(x), N):
+            A = avg.add(x[i:i + N])
+        floor = A[band]
+        print(f"{AVG_LABELS[mode]}: {avg.count} segments, noise floor std/mean = {floor.std() / floor.mean():.3f}, "
+              f"tone amplitude = {A.max():.4f}")
+
+    # 线性平均等于前 n_avg 段功率谱的算术平均，之后不再变化
+    avg = SpectrumAverager(engine, mode=AVG_LINEAR, n_avg=20, overlap=0.5)
+    avg.add(x)
+    segments = [x[i:i + N] for i in range(0, 20 * avg.step, avg.step)]
+    ref = np.sqrt(np.mean([engine.amplitude(seg) ** 2 for seg in segments], axis=0))
+    print(f"Linear average of {avg.count} segments (complete={avg.complete}): "
+          f"max difference from the arithmetic mean {np.max(np.abs(avg.result - ref)):.2e}")
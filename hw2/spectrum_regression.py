@@ -0,0 +1,237 @@
+"""
+频谱精度和计算时间回归测试
+
+原来唯一的检验是 updateSignalAndFFT 里对正弦波的 print。这里对每种窗函数(window_functions 中的全部窗)
+用频谱引擎分析标准信号，与理论值比较:
+    正弦波: 谱线上的幅值为A；不在谱线上时插值后的频率和幅值
+    方波:   奇次谐波幅值 4A/(πn)，偶次谐波为0
+    三角波: 奇次谐波幅值 8A/(π²n²)，偶次谐波为0
+    白噪声: 功率谱密度平坦，均值为 2σ²/Fs
+然后测量 N 从 1k 到 1M 时每帧(加窗+FFT+幅值+dB)的计算时间。
+精度和时间都对 float64 和单精度(dtype=np.float32，检验项名称带 "-f32")两种模式分别测量。
+
+每次的结果追加保存到 JSON 文件中，并与上一次运行比较:
+误差超过理论容限、误差比上次明显增大、或计算时间超过上次的 --time-threshold 倍时报告回归，
+返回非零退出码。
+
+用法:
+    python spectrum_regression.py [--quick] [--no-save] [--results 文件] [--time-threshold 1.5]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from peak_estimator import find_peaks, interpolate_peaks
+from signal_source import SyntheticSource, SINE, SQUARE, TRIANGLE, NOISE
+from spectrum_engine import SpectrumEngine
+from window_functions import WINDOW_NAMES
+
+Fs = 44100
+N = 4096
+AMP = 0.8
+HARMONICS = (1, 2, 3, 4, 5, 7, 9)
+K0 = 23  # 基频所在谱线，与 N 互质，高次谐波混叠后不会落在低次谐波的谱线上
+
+TIMING_SIZES = [1 << 10, 1 << 12, 1 << 14, 1 << 16, 1 << 18, 1 << 20]
+TIMING_WINDOWS = (0, 1)
+DTYPES = {np.float64: '', np.float32: '-f32'}  # 检验项名称后缀
+
+# 容限: 谱线上的幅值误差(相对基波幅值；方波高次谐波混叠后的分量会落进平顶窗很宽的主瓣)、
+# 插值频率误差(谱线)、插值幅值误差(相对)、噪声PSD均值误差(相对)
+TOL_BIN_AMP = 5e-3
+TOL_INTERP_FREQ = 0.2
+TOL_INTERP_AMP = 0.1
+TOL_NOISE_MEAN = 0.05
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spectrum_regression.json')
+
+
+def make_signal(kind, f0, n, amp=AMP, rng=None):
+    """与 DRGenerator 相同的四种标准信号(由 signal_source.SyntheticSource 产生)"""
+    wave = {'sine': SINE, 'square': SQUARE, 'triangle': TRIANGLE}.get(kind, NOISE)
+    x = np.empty(n)
+    SyntheticSource(Fs, wave, freq=f0, amp=amp, seed=rng).read_into(x)
+    return x
+
+
+def expected_harmonic(kind, n):
+    if kind == 'sine':
+        return AMP if n == 1 else 0.0
+    if n % 2 == 0:
+        return 0.0
+    if kind == 'square':
+        return AMP * 4 / (np.pi * n)
+    return AMP * 8 / (np.pi ** 2 * n ** 2)
+
+
+def check_accuracy(dtype=np.float64):
+    """
+    参数:
+        dtype: 频谱引擎和输入信号的精度
+
+    返回:
+        {检验项: (误差, 容限)}
+    """
+    suffix = DTYPES[dtype]
+    results = {}
+    f0 = K0 * Fs / N
+    offbin_freqs = np.linspace(500, 4000, 25) + 0.37
+    rng = np.random.default_rng(2024)
+    noise = make_signal('noise', 0, N * 256, rng=rng).astype(dtype)
+    psd_expected = 2 * AMP ** 2 / Fs
+
+    for win_type, name in enumerate(WINDOW_NAMES):
+        engine = SpectrumEngine(N, Fs, win_type, dtype=dtype)
+        name = name + suffix
+
+        # 谐波幅值(基频正好在谱线上)
+        for kind in ('sine', 'square', 'triangle'):
+            A = engine.amplitude(make_signal(kind, f0, N).astype(dtype))
+            err = max(abs(A[K0 * n] - expected_harmonic(kind, n)) for n in HARMONICS) / AMP
+            results[f"{name}/{kind}/harmonics"] = (float(err), TOL_BIN_AMP)
+
+        # 不在谱线上的正弦波: 插值后的频率和幅值
+        freq_err = amp_err = 0.0
+        for f in offbin_freqs:
+            A = engine.amplitude(make_signal('sine', f, N).astype(dtype))
+            k = find_peaks(A, 1)
+            f_est, a_est = interpolate_peaks(A, k, engine.df, 'window', win_type, engine.N, nfft=engine.nfft)
+            freq_err = max(freq_err, abs(f_est[0] - f) / engine.df)
+            amp_err = max(amp_err, abs(a_est[0] - AMP) / AMP)
+        results[f"{name}/sine/interp_freq"] = (float(freq_err), TOL_INTERP_FREQ)
+        results[f"{name}/sine/interp_amp"] = (float(amp_err), TOL_INTERP_AMP)
+
+        # 白噪声: 平均功率谱密度的均值和平坦度
+        n_frames = len(noise) // N
+        P = np.zeros(len(engine.f))
+        buf = np.empty(len(engine.f))
+        for i in range(n_frames):
+            P += engine.psd(noise[i * N:(i + 1) * N], out=buf)
+        P = P[1:-1] / n_frames
+        results[f"{name}/noise/psd_mean"] = (float(abs(P.mean() / psd_expected - 1)), TOL_NOISE_MEAN)
+        # 每条谱线是 n_frames 帧的平均，相对标准差约为 1/sqrt(n_frames)
+        results[f"{name}/noise/psd_flatness"] = (float(P.std() / P.mean()), 1.5 / np.sqrt(n_frames))
+    return results
+
+
+def time_pipeline(sizes, dtype=np.float64, budget=0.2):
+    """
+    参数:
+        dtype: 频谱引擎和输入信号的精度
+
+    返回:
+        {"窗名/N": 每帧时间(秒)，取若干轮中最快的一轮，减小机器负载波动的影响}
+    """
+    results = {}
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        x = rng.standard_normal(n).astype(dtype)
+        for win_type in TIMING_WINDOWS:
+            engine = SpectrumEngine(n, Fs, win_type, dtype=dtype)
+            engine.amplitude(x)  # 预热(窗函数缓存、FFT计划)
+            engine.db()
+            start = time.perf_counter()
+            engine.amplitude(x)
+            engine.db()
+            once = time.perf_counter() - start
+            repeats = int(min(max(budget / max(once, 1e-9), 5), 2000))
+            samples = []
+            for _ in range(7):
+                start = time.perf_counter()
+                for _ in range(max(repeats // 7, 1)):
+                    engine.amplitude(x)
+                    engine.db()
+                samples.append((time.perf_counter() - start) / max(repeats // 7, 1))
+            results[f"{WINDOW_NAMES[win_type]}{DTYPES[dtype]}/{n}"] = float(min(samples))
+    return results
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def compare(accuracy, timing, previous, time_threshold):
+    """返回回归项列表"""
+    problems = []
+    for key, (err, tol) in accuracy.items():
+        if err > tol:
+            problems.append(f"精度超限  {key}: 误差 {err:.3g} > 容限 {tol:.3g}")
+        if previous:
+            old = previous['accuracy'].get(key)
+            # 误差本身很小时(远低于容限)的波动不算回归
+            if old is not None and err > max(old[0] * 1.5, old[0] + 0.01 * tol):
+                problems.append(f"精度变差  {key}: {old[0]:.3g} -> {err:.3g}")
+    if previous:
+        for key, t in timing.items():
+            old = previous['timing'].get(key)
+            if old is not None and t > old * time_threshold:
+                problems.append(f"速度变慢  {key}: {old * 1e6:.1f} us -> {t * 1e6:.1f} us ({t / old:.2f}x)")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='频谱精度和计算时间回归测试')
+    parser.add_argument('--quick', action='store_true', help='计时只测到 N=64k')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='结果历史文件(JSON)')
+    parser.add_argument('--no-save', action='store_true', help='不保存本次结果')
+    parser.add_argument('--time-threshold', type=float, default=1.5, help='计算时间超过上次的倍数时报告回归')
+    parser.add_argument('--keep', type=int, default=50, help='结果文件中保留的运行次数')
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print(f"频谱精度检验 (N={N}, Fs={Fs}, 基频在第{K0}条谱线, 幅值={AMP})")
+    print("=" * 80)
+    accuracy = {}
+    for dtype in DTYPES:
+        accuracy.update(check_accuracy(dtype))
+    for key, (err, tol) in accuracy.items():
+        print(f"{key:36s} 误差 {err:10.3g}   容限 {tol:.3g}   {'OK' if err <= tol else 'FAIL'}")
+
+    sizes = [n for n in TIMING_SIZES if not args.quick or n <= 1 << 16]
+    print("=" * 80)
+    print("每帧计算时间 (加窗 + FFT + 幅值 + dB)")
+    print("=" * 80)
+    timing = {}
+    for dtype in DTYPES:
+        timing.update(time_pipeline(sizes, dtype))
+    for key, t in timing.items():
+        name, n = key.split('/')
+        print(f"{name:12s} N={int(n):8d}   {t * 1e6:10.1f} us   {t / int(n) * 1e9:6.2f} ns/点")
+
+    history = load_history(args.results)
+    previous = history[-1] if history else None
+    problems = compare(accuracy, timing, previous, args.time_threshold)
+    print("=" * 80)
+    if previous:
+        print(f"与上一次运行比较 ({previous['timestamp']}):")
+    else:
+        print("没有以前的结果，只检查理论容限")
+    for p in problems:
+        print("  " + p)
+    print(f"{'发现 ' + str(len(problems)) + ' 项回归' if problems else '全部通过'}")
+
+    if not args.no_save:
+        history.append({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'accuracy': accuracy,
+            'timing': timing,
+        })
+        with open(args.results, 'w', encoding='utf-8') as fp:
+            json.dump(history[-args.keep:], fp, indent=1)
+        print(f"结果已保存到 {args.results}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+GUI程序启动时间测试
+
+依次在新进程中冷启动每个GUI入口程序，测量从启动解释器到进入事件循环
+(tkinter 的 mainloop 或 Qt 的 exec_) 所用的时间，然后直接退出，不显示窗口交互。
+每个程序运行若干次取中位数，并给出 -X importtime 统计中最慢的几个模块。
+
+用法:
+    python startup_report.py [重复次数]
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+ENTRY_POINTS = [
+    'hw1/sine_generator_drvi.py',
+    'hw1/sine_generator_pyqt.py',
+    'hw1/sine_generator_tkinter.py',
+    'hw2/hw2_complete.py',
+    'hw2/hw2_audio_complete.py',
+]
+
+# 在子进程中执行: 导入 tkinter / PyQt5.QtWidgets 后把事件循环入口替换成"打印标记并退出"
+PROBE = r'''
+import importlib.util, os, runpy, sys
+
+def _stop(*args, **kwargs):
+    sys.stdout.write("STARTUP_OK\n")
+    sys.stdout.flush()
+    os._exit(0)
+
+def _patch(name, module):
+    if name == "tkinter":
+        module.Misc.mainloop = _stop
+    elif name == "PyQt5.QtWidgets":
+        module.QApplication.exec_ = _stop
+        module.QApplication.exec = _stop
+
+class _Probe:
+    names = ("tkinter", "PyQt5.QtWidgets")
+
+    def find_spec(self, name, path, target=None):
+        if name not in self.names:
+            return None
+        sys.meta_path.remove(self)
+        try:
+            spec = importlib.util.find_spec(name)
+        finally:
+            sys.meta_path.insert(0, self)
+        if spec is None or spec.loader is None:
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def wrapped(module):
+            exec_module(module)
+            _patch(name, module)
+        spec.loader.exec_module = wrapped
+        return spec
+
+sys.meta_path.insert(0, _Probe())
+script = sys.argv[1]
+sys.path.insert(0, os.path.dirname(script))
+sys.argv = [script]
+runpy.run_path(script, run_name="__main__")
+'''
+
+
+def run_once(script, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', PROBE, script]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=os.path.dirname(script), capture_output=True, text=True, timeout=120)
+    elapsed = time.perf_counter() - start
+    ok = 'STARTUP_OK' in proc.stdout
+    return ok, elapsed, proc.stderr
+
+
+def slowest_imports(stderr, n=5):
+    """解析 -X importtime 输出，返回累计耗时最多的顶层模块"""
+    rows = []
+    for line in stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if m and len(m.group(3)) <= 1:
+            rows.append((int(m.group(2)) / 1e6, m.group(4)))
+    rows.sort(reverse=True)
+    return rows[:n]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print("=" * 80)
+    print(f"GUI入口程序启动时间 (冷启动到进入事件循环, 每个程序运行 {repeats} 次取中位数)")
+    print("=" * 80)
+    for rel in ENTRY_POINTS:
+        script = os.path.join(ROOT, rel)
+        times = []
+        error = ''
+        for _ in range(repeats):
+            ok, elapsed, stderr = run_once(script)
+            if not ok:
+                error = stderr.strip().splitlines()[-1] if stderr.strip() else '未进入事件循环'
+                break
+            times.append(elapsed)
+        if error:
+            print(f"{rel:32s}  失败: {error}")
+            continue
+        print(f"{rel:32s}  {statistics.median(times) * 1000:8.1f} ms  "
+              f"(min {min(times) * 1000:.1f}, max {max(times) * 1000:.1f})")
+        _, _, stderr = run_once(script, importtime=True)
+        for seconds, name in slowest_imports(stderr):
+            print(f"{'':34s}import {name:28s} {seconds * 1000:7.1f} ms")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()